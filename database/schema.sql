@@ -7,6 +7,9 @@
 -- Enable UUID extension
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
+-- Enable trigram matching (indexed LIKE '%name%' player lookups)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 -- ============================================
 -- 1. TEAMS TABLE
 -- ============================================
@@ -528,6 +531,7 @@ CREATE INDEX IF NOT EXISTS idx_bets_type_category ON bets(bet_type, bet_category
 CREATE INDEX IF NOT EXISTS idx_players_team ON players(team_id);
 CREATE INDEX IF NOT EXISTS idx_players_position ON players(position);
 CREATE INDEX IF NOT EXISTS idx_players_status ON players(status);
+CREATE INDEX IF NOT EXISTS idx_players_name_trgm ON players USING gin (LOWER(full_name) gin_trgm_ops);
 CREATE INDEX IF NOT EXISTS idx_pitchers_era ON pitchers(era);
 CREATE INDEX IF NOT EXISTS idx_pitchers_type ON pitchers(starter_reliever);
 CREATE INDEX IF NOT EXISTS idx_player_stats_game ON player_game_stats(game_id);
@@ -543,6 +547,7 @@ CREATE INDEX IF NOT EXISTS idx_community_members_status ON community_members(sub
 CREATE INDEX IF NOT EXISTS idx_message_log_community ON message_log(community_id);
 CREATE INDEX IF NOT EXISTS idx_message_log_type ON message_log(message_type);
 CREATE INDEX IF NOT EXISTS idx_message_log_status ON message_log(delivery_status);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_message_log_pregame_unique ON message_log(game_id, community_id, scheduled_send_time) WHERE message_type = 'pregame';
 CREATE INDEX IF NOT EXISTS idx_odds_history_game ON odds_history(game_id);
 CREATE INDEX IF NOT EXISTS idx_odds_history_time ON odds_history(recorded_at);
 CREATE INDEX IF NOT EXISTS idx_trends_player ON betting_trends(player_id);
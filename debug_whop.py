@@ -3,7 +3,7 @@
 
 import os
 import sys
-import json
+import orjson
 import requests
 from dotenv import load_dotenv
 
@@ -63,7 +63,7 @@ def test_whop_api():
     }
     
     print(f"\n📝 GraphQL Variables:")
-    print(json.dumps(variables, indent=2))
+    print(orjson.dumps(variables, option=orjson.OPT_INDENT_2).decode())
     
     # Make the request
     url = "https://api.whop.com/v1/graphql"
@@ -82,7 +82,7 @@ def test_whop_api():
         try:
             response_json = response.json()
             print(f"  JSON Response:")
-            print(json.dumps(response_json, indent=2))
+            print(orjson.dumps(response_json, option=orjson.OPT_INDENT_2).decode())
         except:
             print(f"  Raw Response: {response.text}")
             
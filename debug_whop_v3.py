@@ -3,7 +3,7 @@
 
 import os
 import sys
-import json
+import orjson
 import requests
 from dotenv import load_dotenv
 
@@ -126,7 +126,7 @@ def test_corrected_graphql():
         
         if response.status_code == 200:
             data = response.json()
-            print(f"  Response: {json.dumps(data, indent=2)}")
+            print(f"  Response: {orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()}")
             
             if 'data' in data and 'createForumPost' in data['data']:
                 print(f"  ✅ Forum post created successfully!")
@@ -85,6 +85,7 @@ class MLBBettingSystem:
         # Update games
         print("Updating today's games...")
         games = self.mlb_api.update_todays_games()
+        self.mlb_api.wait_for_roster_refresh()
         
         print(f"\n✅ Updated {len(games)} games for today")
         for game in games[:5]:
@@ -12,7 +12,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from src.database import db
 from src.whop_client import WhopGraphQLClient
-from src.message_generator import MessageGenerator
+from src.message_generator import get_generator
 
 def setup_logging():
     """Configure logging for message processing"""
@@ -67,7 +67,7 @@ async def process_message_queue():
 
     # Initialize Whop client
     whop = WhopGraphQLClient()
-    generator = MessageGenerator()
+    generator = get_generator()
     
     try:
         await whop.initialize()
@@ -7,6 +7,37 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.database import db
 from src.mlb_api import MLBAPI
 
+# The pregame scheduler relies on this index for ON CONFLICT. Databases
+# created before it existed may hold duplicate pregame rows, which would
+# stop the index from building, so fold those into the oldest copy first.
+PREGAME_INDEX_MIGRATION = """
+    WITH ranked AS (
+        SELECT message_id,
+               MIN(message_id) OVER (
+                   PARTITION BY game_id, community_id, scheduled_send_time
+               ) AS keep_id
+        FROM message_log
+        WHERE message_type = 'pregame'
+          AND game_id IS NOT NULL
+          AND community_id IS NOT NULL
+          AND scheduled_send_time IS NOT NULL
+    ), dupes AS (
+        SELECT message_id, keep_id FROM ranked WHERE message_id <> keep_id
+    ), repointed AS (
+        UPDATE notification_queue nq
+        SET message_id = dupes.keep_id
+        FROM dupes
+        WHERE nq.message_id = dupes.message_id
+    )
+    DELETE FROM message_log ml
+    USING dupes
+    WHERE ml.message_id = dupes.message_id;
+    
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_message_log_pregame_unique
+        ON message_log(game_id, community_id, scheduled_send_time)
+        WHERE message_type = 'pregame';
+"""
+
 def main():
     print("🚀 Running initial setup...")
     
@@ -15,6 +46,9 @@ def main():
         print("❌ Database connection failed!")
         return
     
+    print("Ensuring pregame alert index...")
+    db.execute(PREGAME_INDEX_MIGRATION)
+    
     # Load MLB data
     api = MLBAPI()
     
@@ -26,6 +60,7 @@ def main():
     
     print("Loading today's games...")
     api.update_todays_games()
+    api.wait_for_roster_refresh()
     
     print("✅ Setup complete!")
 
@@ -15,6 +15,7 @@ def main():
     try:
         api = MLBAPI()
         api.update_todays_games()
+        api.wait_for_roster_refresh()
         print("✅ Daily data refresh completed")
     except Exception as e:
         print(f"❌ Daily data refresh failed: {e}")
@@ -4,8 +4,7 @@ from datetime import datetime
 from typing import Optional, Dict, List
 import logging
 from src.database import db
-from src.openai_parser import BetParser
-from src.smart_validator import SmartBetValidator
+from src.smart_validator import get_validator
 
 logger = logging.getLogger(__name__)
 
@@ -14,8 +13,8 @@ class BetManager:
     """Manage bet entries and updates with smart validation"""
     
     def __init__(self):
-        self.parser = BetParser()
-        self.validator = SmartBetValidator()
+        self.validator = get_validator()
+        self.parser = self.validator.parser
     
     def log_bet(self, raw_input: str, community: str = 'StatEdge') -> Dict:
         """Log a new bet with smart validation"""
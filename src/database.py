@@ -1,20 +1,30 @@
 """Database connection and utilities"""
 
+import atexit
+import threading
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import NamedTupleCursor, RealDictCursor, execute_values as pg_execute_values
 from contextlib import contextmanager
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator
 import logging
 from src.config import Config
 
 logger = logging.getLogger(__name__)
 
+# Rows pulled from the client-side buffer per fetchmany in iter_prepared
+PREPARED_BATCH_SIZE = 500
+
 
 class Database:
     """Database connection manager"""
     
     def __init__(self, connection_string: Optional[str] = None):
         self.connection_string = connection_string or Config.DATABASE_URL
+        # Per-thread connection kept open so PREPAREd statements survive between calls
+        self._local = threading.local()
+        # Every thread's persistent connection, so close_prepared can reach them all
+        self._prepared_conns = set()
+        self._prepared_lock = threading.Lock()
         
     @contextmanager
     def get_connection(self):
@@ -34,10 +44,10 @@ class Database:
                 conn.close()
     
     @contextmanager
-    def get_cursor(self, dict_cursor: bool = False):
+    def get_cursor(self, dict_cursor: bool = False, cursor_factory=None):
         """Context manager for database cursor"""
         with self.get_connection() as conn:
-            cursor_factory = RealDictCursor if dict_cursor else None
+            cursor_factory = cursor_factory or (RealDictCursor if dict_cursor else None)
             cur = conn.cursor(cursor_factory=cursor_factory)
             try:
                 yield cur
@@ -53,6 +63,20 @@ class Database:
         with self.get_cursor() as cur:
             cur.execute(query, params)
     
+    def execute_values(self, query: str, rows: List[tuple],
+                       template: Optional[str] = None, page_size: int = 100,
+                       fetch: bool = False) -> List[tuple]:
+        """Execute a batched INSERT/UPSERT; the query takes a single VALUES %s
+        
+        With fetch=True, returns the RETURNING rows from every page.
+        """
+        if not rows:
+            return []
+        with self.get_cursor() as cur:
+            result = pg_execute_values(cur, query, rows, template=template,
+                                       page_size=page_size, fetch=fetch)
+            return result or []
+    
     def fetchone(self, query: str, params: Optional[tuple] = None) -> Optional[tuple]:
         """Fetch a single row"""
         with self.get_cursor() as cur:
@@ -71,6 +95,88 @@ class Database:
             cur.execute(query, params)
             return cur.fetchall()
     
+    def fetch_namedtuples(self, query: str, params: Optional[tuple] = None) -> List[tuple]:
+        """Fetch all rows as namedtuples (attribute access, no per-row dict)"""
+        with self.get_cursor(cursor_factory=NamedTupleCursor) as cur:
+            cur.execute(query, params)
+            return cur.fetchall()
+    
+    def _prepared_connection(self):
+        """This thread's persistent connection, with the names prepared on it"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or conn.closed:
+            conn = psycopg2.connect(self.connection_string)
+            conn.autocommit = True
+            with self._prepared_lock:
+                self._prepared_conns.add(conn)
+            self._local.conn = conn
+            self._local.prepared = set()
+        return conn, self._local.prepared
+    
+    def _discard_prepared_connection(self):
+        """Close this thread's persistent connection and forget what was prepared on it"""
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        self._local.prepared = set()
+        if conn is not None:
+            with self._prepared_lock:
+                self._prepared_conns.discard(conn)
+            if not conn.closed:
+                conn.close()
+    
+    def close_prepared(self):
+        """Close the persistent connections of every thread (called at exit)"""
+        with self._prepared_lock:
+            conns, self._prepared_conns = self._prepared_conns, set()
+        for conn in conns:
+            if not conn.closed:
+                conn.close()
+    
+    def iter_prepared(self, name: str, query: str, params: tuple = (),
+                      dict_cursor: bool = False) -> Iterator:
+        """Yield rows from a server-side prepared statement
+        
+        The query uses $1, $2, ... placeholders and is PREPAREd once per connection,
+        so repeat calls skip parsing and planning. Meant for read-only hot queries.
+        The cursor is client-side, so the whole result is buffered on EXECUTE;
+        rows are only turned into Python objects in batches as they are consumed.
+        """
+        cursor_factory = RealDictCursor if dict_cursor else None
+        execute = f"EXECUTE {name} ({', '.join(['%s'] * len(params))})" if params else f"EXECUTE {name}"
+        
+        for attempt in range(2):
+            conn, prepared = self._prepared_connection()
+            cur = conn.cursor(cursor_factory=cursor_factory)
+            try:
+                if name not in prepared:
+                    cur.execute(f"PREPARE {name} AS {query}")
+                    prepared.add(name)
+                cur.execute(execute, params)
+                break
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                # Dropped connection: reconnect (and re-prepare) once
+                cur.close()
+                self._discard_prepared_connection()
+                if attempt:
+                    logger.error(f"Database error: {e}")
+                    raise
+            except Exception as e:
+                cur.close()
+                logger.error(f"Database error: {e}")
+                raise
+        
+        with cur:
+            while True:
+                rows = cur.fetchmany(PREPARED_BATCH_SIZE)
+                if not rows:
+                    break
+                yield from rows
+    
+    def fetch_prepared(self, name: str, query: str, params: tuple = (),
+                       dict_cursor: bool = False) -> List:
+        """Fetch all rows from a server-side prepared statement (see iter_prepared)"""
+        return list(self.iter_prepared(name, query, params, dict_cursor))
+    
     def test_connection(self) -> bool:
         """Test database connection"""
         try:
@@ -97,4 +203,5 @@ class Database:
 
 
 # Create global database instance
-db = Database()
\ No newline at end of file
+db = Database()
+atexit.register(db.close_prepared)
\ No newline at end of file
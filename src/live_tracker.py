@@ -6,9 +6,18 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from src.database import db
 from src.mlb_api import MLBAPI
+from src.milestone_rules import detect_milestone
 
 logger = logging.getLogger(__name__)
 
+# Live feed paths read by update_game_stats
+GAME_FEED_FIELDS = ['/gameData/status', '/liveData/linescore', '/liveData/boxscore']
+
+# Bet type groups for the stat lookups and hit checks below
+ML_STATS = frozenset({'moneyline', 'ml'})
+TEAM_STATS = frozenset({'moneyline', 'ml', 'spread', 'total'})
+FINAL_STATUSES = frozenset({'Final', 'Game Over', 'Completed'})
+
 
 class LiveGameTracker:
     """Production live game tracker with message triggering"""
@@ -58,20 +67,19 @@ class LiveGameTracker:
     def update_game_stats(self, game_id: int) -> Dict:
         """Pull live stats from MLB API for a specific game"""
         try:
-            # Get live game feed
-            game_data = self.mlb_api.get_game_feed(game_id)
+            # Get only the parts of the live feed we use (skips play-by-play)
+            game_data = self.mlb_api.get_game_feed(game_id, fields=GAME_FEED_FIELDS)
             
             if not game_data:
                 logger.warning(f"No data returned for game {game_id}")
                 return {}
             
             # Extract live data
-            live_data = game_data.get('liveData', {})
-            box_score = live_data.get('boxscore', {})
-            linescore = live_data.get('linescore', {})
+            box_score = game_data.get('/liveData/boxscore') or {}
+            linescore = game_data.get('/liveData/linescore') or {}
             
             # Update game status
-            game_state = game_data.get('gameData', {}).get('status', {})
+            game_state = game_data.get('/gameData/status') or {}
             
             db.execute("""
                 UPDATE games 
@@ -274,7 +282,7 @@ class LiveGameTracker:
                 current_value = float(stat[0]) if stat else 0.0
         
         # Team bets (moneyline, spread, total)
-        elif bet_type in ['moneyline', 'ml', 'spread', 'total']:
+        elif bet_type in TEAM_STATS:
             game_info = db.fetchone("""
                 SELECT home_score, away_score, status, 
                        home_team_id, away_team_id
@@ -284,9 +292,9 @@ class LiveGameTracker:
             if game_info:
                 home_score, away_score, status, home_id, away_id = game_info
                 
-                if bet_type in ['moneyline', 'ml']:
+                if bet_type in ML_STATS:
                     # For moneyline, only mark as won if game is FINAL and team won
-                    if status in ['Final', 'Game Over', 'Completed']:
+                    if status in FINAL_STATUSES:
                         # Game is final - check who won
                         if bet['team_id'] == home_id:
                             current_value = 1 if home_score > away_score else 0
@@ -321,86 +329,7 @@ class LiveGameTracker:
         }
         
         # Smart milestone detection based on bet type
-        milestone_hit = None
-        milestone_type = None
-        
-        # Player props: Smart thresholds based on target value
-        if bet_type.lower() in ['hrs', 'home runs', 'hits', 'h', 'rbis', 'rbi', 'sb', 'stolen bases', 'total bases', 'bases']:
-            target = float(bet.get('target_value', 2))
-            
-            # Low targets (≤2.5): Trigger on first progress
-            if target <= 2.5:
-                if prev_value == 0 and current_value >= 1 and alerts_sent == 0:
-                    milestone_hit = 1
-                    milestone_type = 'first_progress'
-            
-            # Medium targets (2.5-4.0): Trigger at 50% and near completion
-            elif target <= 4.0:
-                if current_value >= target * 0.5 and prev_value < target * 0.5 and alerts_sent == 0:
-                    milestone_hit = current_value
-                    milestone_type = 'halfway'
-                elif current_value >= target * 0.8 and prev_value < target * 0.8 and alerts_sent < 2:
-                    milestone_hit = current_value
-                    milestone_type = 'near_complete'
-            
-            # High targets (>4.0): Use existing 50% and 80% logic
-            else:
-                if current_value >= target * 0.5 and prev_value < target * 0.5 and alerts_sent == 0:
-                    milestone_hit = current_value
-                    milestone_type = 'halfway'
-                elif current_value >= target * 0.8 and prev_value < target * 0.8 and alerts_sent < 2:
-                    milestone_hit = current_value
-                    milestone_type = 'near_complete'
-        
-        # Strikeouts: Smart thresholds based on target value
-        elif bet_type in ['ks', 'strikeouts']:
-            target = float(bet.get('target_value', 6))
-            
-            # Low targets (≤2.5): Trigger on first strikeout
-            if target <= 2.5:
-                if prev_value == 0 and current_value >= 1 and alerts_sent == 0:
-                    milestone_hit = 1
-                    milestone_type = 'first_progress'
-            
-            # Medium/High targets (>2.5): Use 50% and 80% thresholds
-            else:
-                # First update at ~50% (shows momentum)
-                if current_value >= target * 0.5 and prev_value < target * 0.5 and alerts_sent == 0:
-                    milestone_hit = current_value
-                    milestone_type = 'halfway'
-                
-                # Second update at 80% or last K needed
-                elif current_value >= target * 0.8 and prev_value < target * 0.8 and alerts_sent < 2:
-                    milestone_hit = current_value
-                    milestone_type = 'near_complete'
-        
-        # Moneyline: Update on lead changes
-        elif bet_type in ['moneyline', 'ml']:
-            if current_value == 1 and prev_value == 0 and alerts_sent == 0:
-                milestone_hit = 'took_lead'
-                milestone_type = 'lead_change'
-        
-        # Spread: Update when first covered
-        elif bet_type == 'spread':
-            if current_value >= target and prev_value < target and alerts_sent == 0:
-                milestone_hit = 'covering'
-                milestone_type = 'spread_covered'
-        
-        # Totals: Smart thresholds based on target value
-        elif bet_type == 'total':
-            target = float(bet.get('target_value', 8.5))
-            
-            # Low targets (≤2.5): Trigger on first score
-            if target <= 2.5:
-                if prev_value == 0 and current_value >= 1 and alerts_sent == 0:
-                    milestone_hit = 1
-                    milestone_type = 'first_progress'
-            
-            # Higher targets: Use 75% threshold
-            else:
-                if current_value >= target * 0.75 and prev_value < target * 0.75 and alerts_sent == 0:
-                    milestone_hit = current_value
-                    milestone_type = 'nearing_total'
+        milestone_hit, milestone_type = detect_milestone(bet_type, current_value, prev_value, alerts_sent, bet.get('target_value'), game_status)
         
         # Check if bet is hit (case-insensitive operator comparison)
         is_hit = False
@@ -412,7 +341,7 @@ class LiveGameTracker:
             is_hit = current_value < target
         elif operator_lower == 'exactly':
             is_hit = current_value == target
-        elif operator is None and bet_type in ['moneyline', 'ml']:
+        elif operator is None and bet_type in ML_STATS:
             is_hit = current_value == 1
         
         return {
@@ -715,7 +644,7 @@ class LiveGameTracker:
                             # Create descriptive bet name for logging
                             if bet.get('player_name'):
                                 bet_description = f"{bet['player_name']} {bet.get('bet_type', '')}"
-                            elif bet.get('bet_type', '').lower() in ['moneyline', 'ml']:
+                            elif bet.get('bet_type', '').lower() in ML_STATS:
                                 # Try to get team name from the bet
                                 team_name = "Team"
                                 if bet.get('raw_input'):
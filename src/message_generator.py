@@ -1,12 +1,55 @@
 """Generate authentic betting messages with OpenAI"""
 
 import openai
+import orjson
 import os
-from typing import Dict
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from threading import Lock
+from typing import Callable, Dict, List, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Generated messages are served stale-while-revalidate: fresh for MESSAGE_TTL seconds,
+# refreshed in the background during the last MESSAGE_STALE_WINDOW of that
+MESSAGE_CACHE_SIZE = 1024
+MESSAGE_TTL = 300
+MESSAGE_STALE_WINDOW = 60
+_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='message-refresh')
+
+# Function schema for generating every tier's pre-game post in one completion
+PREGAME_MESSAGES_FUNCTION = {
+    "name": "record_pregame_messages",
+    "description": "Record one pre-game announcement per community tier",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "messages": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "community": {"type": "string"},
+                        "title": {"type": "string"},
+                        "content": {"type": "string"}
+                    },
+                    "required": ["community", "title", "content"]
+                }
+            }
+        },
+        "required": ["messages"]
+    }
+}
+
+
+@lru_cache(maxsize=256)
+def _value_display(units: float, value_multiplier: float) -> str:
+    """Dollar value shown for a bet, e.g. 2u at 19.999 -> $39,998"""
+    return f"${int(units * value_multiplier * 1000):,}"
+
 
 class MessageGenerator:
     """Generate TrustMySystem-style messages"""
@@ -14,6 +57,19 @@ class MessageGenerator:
     def __init__(self):
         openai.api_key = os.getenv('OPENAI_API_KEY')
         
+        # Optional OpenAI-compatible local endpoint (vLLM/Ollama) for the short,
+        # stylized live-update prompts. Unset = everything goes to OpenAI.
+        self.local_llm_url = os.getenv('LOCAL_LLM_URL')
+        self.local_llm_model = os.getenv('LOCAL_LLM_MODEL', 'llama-3-8b-awq')
+        
+        # System prompts are static, so build the message dicts once
+        self.system_messages = {
+            'pregame': {"role": "system", "content": "You create authentic sports betting community messages."},
+            'milestone': {"role": "system", "content": "You're a hype betting enthusiast texting friends about live bets. Sound human, excited, and conversational. NO corporate language or percentages."},
+            'streak': {"role": "system", "content": "You create exciting winning streak announcements."},
+            'smart_milestone': {"role": "system", "content": "You create positive, exciting sports betting updates. Never sound worried or negative."}
+        }
+        
         self.tier_styles = {
             'StatEdge': {
                 'tone': 'friendly, accessible, community-focused',
@@ -32,11 +88,106 @@ class MessageGenerator:
                 'value_multiplier': 19.999  # Show as $19,999
             }
         }
+        
+        self._message_cache: 'OrderedDict[tuple, Tuple[float, Dict]]' = OrderedDict()
+        self._message_cache_lock = Lock()
+        self._refreshing = set()
+    
+    def _cached_message(self, kind: tuple, bet: Dict, generate: Callable[[], Dict]) -> Dict:
+        """Serve a cached message, refreshing it in the background once it nears MESSAGE_TTL
+        
+        generate() should raise on failure so fallbacks never get cached.
+        """
+        try:
+            key = kind + (frozenset(bet.items()),)
+        except TypeError:
+            # Unhashable bet fields, generate without caching
+            return generate()
+        
+        with self._message_cache_lock:
+            entry = self._message_cache.get(key)
+        
+        if entry:
+            age = time.monotonic() - entry[0]
+            if age < MESSAGE_TTL:
+                if age >= MESSAGE_TTL - MESSAGE_STALE_WINDOW:
+                    self._schedule_refresh(key, generate)
+                return dict(entry[1])
+        
+        message = generate()
+        self._store_message(key, message)
+        return dict(message)
+    
+    def _schedule_refresh(self, key: tuple, generate: Callable[[], Dict]):
+        """Regenerate a message off-thread, at most one refresh per key"""
+        with self._message_cache_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        _refresh_executor.submit(self._refresh_message, key, generate)
+    
+    def _refresh_message(self, key: tuple, generate: Callable[[], Dict]):
+        """Background refresh; on failure the stale entry simply ages out"""
+        try:
+            self._store_message(key, generate())
+        except Exception as e:
+            logger.warning(f"Background message refresh failed: {e}")
+        finally:
+            with self._message_cache_lock:
+                self._refreshing.discard(key)
+    
+    def _store_message(self, key: tuple, message: Dict):
+        """Cache a generated message, evicting the oldest past MESSAGE_CACHE_SIZE"""
+        with self._message_cache_lock:
+            self._message_cache[key] = (time.monotonic(), message)
+            self._message_cache.move_to_end(key)
+            if len(self._message_cache) > MESSAGE_CACHE_SIZE:
+                self._message_cache.popitem(last=False)
+    
+    def _chat_completion(self, messages: List[Dict], temperature: float, local: bool = False, **kwargs):
+        """Run a chat completion, preferring the local model for non-critical prompts
+        
+        Extra kwargs (e.g. functions/function_call) are passed through to the API.
+        """
+        if local and self.local_llm_url:
+            try:
+                return openai.ChatCompletion.create(
+                    model=self.local_llm_model,
+                    messages=messages,
+                    temperature=temperature,
+                    api_base=self.local_llm_url,
+                    api_key='EMPTY',
+                    **kwargs
+                )
+            except Exception as e:
+                logger.warning(f"Local LLM failed, falling back to OpenAI: {e}")
+        
+        return openai.ChatCompletion.create(
+            model="gpt-3.5-turbo",
+            messages=messages,
+            temperature=temperature,
+            **kwargs
+        )
     
     def generate_pregame_message(self, bet: Dict, community: str) -> Dict:
         """Generate pre-game announcement"""
-        
+        try:
+            bet = dict(bet)
+            return self._cached_message(
+                ('pregame', community), bet,
+                lambda: self._generate_pregame(bet, community)
+            )
+        except Exception as e:
+            logger.error(f"OpenAI generation failed: {e}")
+            return {
+                'title': self._get_fallback_title(bet, community),
+                'content': self._get_fallback_content(bet, community)
+            }
+    
+    def _generate_pregame(self, bet: Dict, community: str) -> Dict:
+        """Generate a pre-game announcement; failures raise so they aren't cached"""
         style = self.tier_styles[community]
+        value_display = _value_display(bet['units'], style.get('value_multiplier', 1))
         
         # Build prompt for OpenAI
         prompt = f"""
@@ -51,7 +202,7 @@ class MessageGenerator:
         Style guidelines:
         - Tone: {style['tone']}
         - Use emojis: {style['emojis']}
-        - For Premium: Show value as ${int(bet['units'] * style.get('value_multiplier', 1) * 1000):,}
+        - For Premium: Show value as {value_display}
         - For VIP: Show as "{bet['units']}k"
         - Keep it short and impactful
         
@@ -60,44 +211,104 @@ class MessageGenerator:
         CONTENT: [content]
         """
         
+        response = self._chat_completion(
+            messages=[self.system_messages['pregame'], {"role": "user", "content": prompt}],
+            temperature=0.7
+        )
+        
+        # Parse response
+        text = response.choices[0].message.content
+        lines = text.split('\n')
+        
+        title = ""
+        content = ""
+        
+        for line in lines:
+            if line.startswith('TITLE:'):
+                title = line.replace('TITLE:', '').strip()
+            elif line.startswith('CONTENT:'):
+                content = line.replace('CONTENT:', '').strip()
+        
+        # Add CTA for free tier
+        if community == 'StatEdge' and style['cta']:
+            content += f"\n\n{style['cta']}"
+        
+        return {
+            'title': title or self._get_fallback_title(bet, community),
+            'content': content or self._get_fallback_content(bet, community)
+        }
+    
+    def generate_pregame_messages(self, bet: Dict, communities: List[str]) -> Dict[str, Dict]:
+        """Generate pre-game announcements for several tiers with a single completion"""
+        communities = tuple(communities)
+        
+        generated = {}
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You create authentic sports betting community messages."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7
+            bet = dict(bet)
+            generated = self._cached_message(
+                ('pregame_batch', communities), bet,
+                lambda: self._generate_pregame_batch(bet, communities)
             )
-            
-            # Parse response
-            text = response.choices[0].message.content
-            lines = text.split('\n')
-            
-            title = ""
-            content = ""
-            
-            for line in lines:
-                if line.startswith('TITLE:'):
-                    title = line.replace('TITLE:', '').strip()
-                elif line.startswith('CONTENT:'):
-                    content = line.replace('CONTENT:', '').strip()
+        except Exception as e:
+            logger.error(f"OpenAI batch generation failed: {e}")
+        
+        messages = {}
+        for community in communities:
+            message = generated.get(community, {})
+            title = (message.get('title') or '').strip()
+            content = (message.get('content') or '').strip()
             
             # Add CTA for free tier
-            if community == 'StatEdge' and style['cta']:
-                content += f"\n\n{style['cta']}"
+            cta = self.tier_styles[community]['cta']
+            if content and community == 'StatEdge' and cta:
+                content += f"\n\n{cta}"
             
-            return {
+            messages[community] = {
                 'title': title or self._get_fallback_title(bet, community),
                 'content': content or self._get_fallback_content(bet, community)
             }
-            
-        except Exception as e:
-            logger.error(f"OpenAI generation failed: {e}")
-            return {
-                'title': self._get_fallback_title(bet, community),
-                'content': self._get_fallback_content(bet, community)
-            }
+        return messages
+    
+    def _generate_pregame_batch(self, bet: Dict, communities: Tuple[str, ...]) -> Dict[str, Dict]:
+        """Raw per-tier messages from one completion; failures raise so they aren't cached"""
+        tier_lines = []
+        for community in communities:
+            style = self.tier_styles[community]
+            value_display = _value_display(bet['units'], style.get('value_multiplier', 1))
+            line = f"- {community}: tone {style['tone']}, emojis {style['emojis']}"
+            if community == 'StatEdge Premium':
+                line += f", show value as {value_display}"
+            elif community == 'StatEdge+':
+                line += f", show units as \"{bet['units']}k\""
+            tier_lines.append(line)
+        tiers = '\n        '.join(tier_lines)
+        
+        prompt = f"""
+        Create one pre-game betting announcement for each community below.
+        
+        Bet details:
+        - Team: {bet.get('team_name', bet.get('player_name'))}
+        - Type: {bet['bet_type']}
+        - Odds: {bet['odds']}
+        - Units: {bet['units']}
+        
+        Communities:
+        {tiers}
+        
+        Keep each one short and impactful.
+        """
+        
+        response = self._chat_completion(
+            messages=[self.system_messages['pregame'], {"role": "user", "content": prompt}],
+            temperature=0.7,
+            functions=[PREGAME_MESSAGES_FUNCTION],
+            function_call={"name": PREGAME_MESSAGES_FUNCTION["name"]}
+        )
+        arguments = orjson.loads(response.choices[0].message.function_call.arguments)
+        generated = {m['community']: m for m in arguments.get('messages', []) if m.get('community')}
+        if not generated:
+            raise ValueError("Completion returned no tier messages")
+        return generated
     
     def generate_milestone_message(self, bet: Dict, community: str) -> Dict:
         """Generate milestone progress message"""
@@ -158,13 +369,10 @@ class MessageGenerator:
         """
         
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You're a hype betting enthusiast texting friends about live bets. Sound human, excited, and conversational. NO corporate language or percentages."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.9
+            response = self._chat_completion(
+                messages=[self.system_messages['milestone'], {"role": "user", "content": prompt}],
+                temperature=0.9,
+                local=True
             )
             
             # Parse response
@@ -267,13 +475,10 @@ class MessageGenerator:
         """
         
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You create exciting winning streak announcements."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.9
+            response = self._chat_completion(
+                messages=[self.system_messages['streak'], {"role": "user", "content": prompt}],
+                temperature=0.9,
+                local=True
             )
             
             text = response.choices[0].message.content
@@ -362,7 +567,21 @@ class MessageGenerator:
 
     def generate_smart_milestone_message(self, bet: Dict, milestone_type: str, community: str) -> Dict:
         """Generate smart milestone messages with positive framing"""
-        
+        try:
+            bet = dict(bet)
+            return self._cached_message(
+                ('smart_milestone', milestone_type, community), bet,
+                lambda: self._generate_smart_milestone(bet, milestone_type, community)
+            )
+        except Exception as e:
+            logger.error(f"OpenAI smart milestone generation failed: {e}")
+            return {
+                'title': self._get_smart_fallback_title(bet, milestone_type, community),
+                'content': self._get_smart_fallback_content(bet, milestone_type, community)
+            }
+    
+    def _generate_smart_milestone(self, bet: Dict, milestone_type: str, community: str) -> Dict:
+        """Generate a smart milestone message; failures raise so they aren't cached"""
         style = self.tier_styles[community]
         
         # Build context-aware prompts based on milestone type
@@ -427,40 +646,29 @@ class MessageGenerator:
         
         prompt = prompts.get(milestone_type, prompts['first_progress'])
         
-        try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You create positive, exciting sports betting updates. Never sound worried or negative."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.8
-            )
-            
-            # Parse response
-            text = response.choices[0].message.content
-            lines = text.split('\n')
-            
-            title = ""
-            content = ""
-            
-            for line in lines:
-                if line.startswith('TITLE:'):
-                    title = line.replace('TITLE:', '').strip()
-                elif line.startswith('CONTENT:'):
-                    content = line.replace('CONTENT:', '').strip()
-            
-            return {
-                'title': title or self._get_smart_fallback_title(bet, milestone_type, community),
-                'content': content or self._get_smart_fallback_content(bet, milestone_type, community)
-            }
-            
-        except Exception as e:
-            logger.error(f"OpenAI smart milestone generation failed: {e}")
-            return {
-                'title': self._get_smart_fallback_title(bet, milestone_type, community),
-                'content': self._get_smart_fallback_content(bet, milestone_type, community)
-            }
+        response = self._chat_completion(
+            messages=[self.system_messages['smart_milestone'], {"role": "user", "content": prompt}],
+            temperature=0.8,
+            local=True
+        )
+        
+        # Parse response
+        text = response.choices[0].message.content
+        lines = text.split('\n')
+        
+        title = ""
+        content = ""
+        
+        for line in lines:
+            if line.startswith('TITLE:'):
+                title = line.replace('TITLE:', '').strip()
+            elif line.startswith('CONTENT:'):
+                content = line.replace('CONTENT:', '').strip()
+        
+        return {
+            'title': title or self._get_smart_fallback_title(bet, milestone_type, community),
+            'content': content or self._get_smart_fallback_content(bet, milestone_type, community)
+        }
 
     def _get_smart_fallback_title(self, bet: Dict, milestone_type: str, community: str) -> str:
         """Smart fallback titles"""
@@ -500,4 +708,10 @@ class MessageGenerator:
         elif community == 'StatEdge+':
             return f"{base}\n\n🔥 VIP MEMBERS ONLY"
         else:
-            return f"{base}\n\nWant VIP + Premium access? Link in bio"
\ No newline at end of file
+            return f"{base}\n\nWant VIP + Premium access? Link in bio"
+
+
+@lru_cache(maxsize=1)
+def get_generator() -> MessageGenerator:
+    """Shared generator, so scripts reuse one instance and its prompt tables"""
+    return MessageGenerator()
\ No newline at end of file
@@ -1,22 +1,30 @@
 """Message sender for community notifications"""
 
+import os
 import logging
+import orjson
 import requests
 from typing import Dict
 
 logger = logging.getLogger(__name__)
 
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
 
 class MessageSender:
     """Send messages to Discord/Telegram"""
     
+    def __init__(self):
+        self.session = requests.Session()
+        self.telegram_bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
+    
     def send_message(self, message: Dict) -> bool:
         """Send a message to the appropriate platform"""
         
         try:
             # For now, just log the message
-            logger.info(f"Would send to {message['community_name']}: {message['message_title']}")
-            logger.info(f"Content: {message['message_content']}")
+            logger.info("Would send to %s: %s", message['community_name'], message['message_title'])
+            logger.info("Content: %s", message['message_content'])
             
             # TODO: Implement actual Discord webhook
             # if message.get('discord_webhook_url'):
@@ -34,10 +42,33 @@ class MessageSender:
     
     def send_discord(self, message: Dict) -> bool:
         """Send to Discord via webhook"""
-        # TODO: Implement Discord sending
-        pass
+        body = orjson.dumps({
+            'embeds': [{
+                'title': message['message_title'],
+                'description': message['message_content']
+            }]
+        })
+        return self._post_json(message['discord_webhook_url'], body, 'Discord')
     
     def send_telegram(self, message: Dict) -> bool:
         """Send to Telegram"""
-        # TODO: Implement Telegram sending
-        pass
\ No newline at end of file
+        if not self.telegram_bot_token:
+            logger.error("TELEGRAM_BOT_TOKEN not set")
+            return False
+        
+        body = orjson.dumps({
+            'chat_id': message['telegram_chat_id'],
+            'text': f"{message['message_title']}\n\n{message['message_content']}"
+        })
+        url = f"https://api.telegram.org/bot{self.telegram_bot_token}/sendMessage"
+        return self._post_json(url, body, 'Telegram')
+    
+    def _post_json(self, url: str, body: bytes, platform: str) -> bool:
+        """POST a pre-serialized JSON body"""
+        try:
+            response = self.session.post(url, data=body, headers=JSON_HEADERS, timeout=10)
+            response.raise_for_status()
+            return True
+        except requests.RequestException as e:
+            logger.error(f"{platform} send failed: {e}")
+            return False
\ No newline at end of file
@@ -0,0 +1,101 @@
+"""Smart milestone rules shared by the live tracker and its tests"""
+
+from typing import Dict, Optional, Tuple
+
+
+def _target(target_value, default: float) -> float:
+    """Bet line as a float, or the rule's default when the bet has none"""
+    return float(default if target_value is None else target_value)
+
+
+def _first_progress(current: float, prev: float, alerts_sent: int):
+    """Low targets (≤2.5) alert on the first unit of progress"""
+    if prev == 0 and current >= 1 and alerts_sent == 0:
+        return 1, 'first_progress'
+    return None, None
+
+
+def _threshold_stat(current: float, prev: float, alerts_sent: int, target: float):
+    """First progress on low targets, else 50% then 80% of the line"""
+    if target <= 2.5:
+        return _first_progress(current, prev, alerts_sent)
+    half = target * 0.5
+    near = target * 0.8
+    
+    # First update at ~50% (shows momentum)
+    if current >= half and prev < half and alerts_sent == 0:
+        return current, 'halfway'
+    
+    # Second update at 80% or last unit needed
+    if current >= near and prev < near and alerts_sent < 2:
+        return current, 'near_complete'
+    return None, None
+
+
+def _counting_stat(current: float, prev: float, alerts_sent: int, target_value, game_status: Dict):
+    """Player props (default line 2)"""
+    return _threshold_stat(current, prev, alerts_sent, _target(target_value, 2))
+
+
+def _strikeout_stat(current: float, prev: float, alerts_sent: int, target_value, game_status: Dict):
+    """Strikeouts (default line 6)"""
+    return _threshold_stat(current, prev, alerts_sent, _target(target_value, 6))
+
+
+def _ml_stat(current: float, prev: float, alerts_sent: int, target_value, game_status: Dict):
+    """Moneyline: update on lead changes"""
+    if current == 1 and prev == 0 and alerts_sent == 0:
+        return 'took_lead', 'lead_change'
+    return None, None
+
+
+def _spread_stat(current: float, prev: float, alerts_sent: int, target_value, game_status: Dict):
+    """Spread: update when first covered"""
+    target = float(target_value or 1)
+    if current >= target and prev < target and alerts_sent == 0:
+        return 'covering', 'spread_covered'
+    return None, None
+
+
+def _total_stat(current: float, prev: float, alerts_sent: int, target_value, game_status: Dict):
+    """Totals: first score on low targets, else 75% of the line (default line 8.5)"""
+    target = _target(target_value, 8.5)
+    if target <= 2.5:
+        return _first_progress(current, prev, alerts_sent)
+    three_q = target * 0.75
+    if current >= three_q and prev < three_q and alerts_sent == 0:
+        return current, 'nearing_total'
+    return None, None
+
+
+# Bet type -> handler returning (milestone_hit, milestone_type)
+MILESTONE_HANDLERS = {
+    'hrs': _counting_stat,
+    'home runs': _counting_stat,
+    'hits': _counting_stat,
+    'h': _counting_stat,
+    'rbis': _counting_stat,
+    'rbi': _counting_stat,
+    'sb': _counting_stat,
+    'stolen bases': _counting_stat,
+    'total bases': _counting_stat,
+    'bases': _counting_stat,
+    'ks': _strikeout_stat,
+    'strikeouts': _strikeout_stat,
+    'moneyline': _ml_stat,
+    'ml': _ml_stat,
+    'spread': _spread_stat,
+    'total': _total_stat
+}
+
+
+def detect_milestone(bet_type: str, current: float, prev: float, alerts_sent: int,
+                     target_value, game_status: Dict) -> Tuple[Optional[object], Optional[str]]:
+    """Return (milestone_hit, milestone_type) for a stat update, or (None, None)
+    
+    target_value is the bet's raw line (None if unset); each rule applies its own default.
+    """
+    handler = MILESTONE_HANDLERS.get(bet_type)
+    if not handler:
+        return None, None
+    return handler(current, prev, alerts_sent, target_value, game_status)
\ No newline at end of file
@@ -1,47 +1,166 @@
 """MLB Stats API integration"""
 
+import orjson
 import requests
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Any
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from datetime import datetime
+from functools import lru_cache
+from threading import Lock
+from typing import List, Dict, Optional, Any, Tuple
+from urllib.parse import urlencode
+from zoneinfo import ZoneInfo
 import logging
 from src.config import Config
 from src.database import db
 
+# Optional: lazy JSON pointer extraction for the large live feed
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
 logger = logging.getLogger(__name__)
 
+# Roster fetches are pure HTTP wait, so fan them out; DB writes stay serial
+ROSTER_FETCH_WORKERS = 10
+
+# Keep-alive connections per host: every roster worker plus the caller's own requests
+HTTP_POOL_SIZE = ROSTER_FETCH_WORKERS * 2
+
+# Roster refreshes triggered by the schedule update run here, off the caller's thread
+_background = ThreadPoolExecutor(max_workers=1, thread_name_prefix='roster-refresh')
+
+EASTERN = ZoneInfo('America/New_York')
+
+# Responses kept for conditional requests: teams, schedule and every roster.
+# Live game feeds are left out - they change every pitch and run to megabytes.
+HTTP_CACHE_SIZE = 64
+
+
+@lru_cache(maxsize=4096)
+def _utc_to_eastern(utc_time_str: str) -> datetime:
+    """Parse an MLB UTC timestamp into naive Eastern wall time (DST-aware)"""
+    utc_time = datetime.fromisoformat(utc_time_str.replace('Z', '+00:00'))
+    return utc_time.astimezone(EASTERN).replace(tzinfo=None)
+
+
+def _log_roster_refresh_failure(future: Future) -> None:
+    """Surface errors from a background roster refresh"""
+    error = future.exception()
+    if error:
+        logger.error(f"Background roster refresh failed: {error}")
+
+
+def _simdjson_at(doc, pointer: str) -> Any:
+    """Resolve a JSON pointer on a simdjson document into plain Python values"""
+    try:
+        value = doc.at_pointer(pointer)
+    except (KeyError, IndexError, ValueError):
+        return None
+    if isinstance(value, simdjson.Object):
+        return value.as_dict()
+    if isinstance(value, simdjson.Array):
+        return value.as_list()
+    return value
+
+
+def _dict_at(data: Any, pointer: str) -> Any:
+    """Resolve a JSON pointer on already-decoded data"""
+    for part in pointer.lstrip('/').split('/'):
+        part = part.replace('~1', '/').replace('~0', '~')
+        if isinstance(data, dict):
+            data = data.get(part)
+        elif isinstance(data, list) and part.isdigit() and int(part) < len(data):
+            data = data[int(part)]
+        else:
+            return None
+    return data
+
 
 class MLBAPI:
     """MLB Stats API client"""
     
+    # Validators and bodies of earlier responses, shared because callers build MLBAPI per use
+    _http_cache: 'OrderedDict[str, Tuple[Dict[str, str], bytes]]' = OrderedDict()
+    _http_cache_lock = Lock()
+    
     def __init__(self):
         self.base_url = Config.MLB_API_BASE_URL
         self.session = requests.Session()
+        # Pool sized for the parallel roster fetch so connections are reused
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, pool_block=False)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.roster_refresh: Optional[Future] = None
     
     def _convert_utc_to_eastern(self, utc_time_str: str) -> datetime:
         """Convert MLB API UTC time to Eastern Time"""
         try:
             # Parse MLB API time format: 2025-08-19T18:20:00Z
-            utc_time = datetime.fromisoformat(utc_time_str.replace('Z', '+00:00'))
-            
-            # Convert to Eastern Time (UTC-4 for EDT, UTC-5 for EST)
-            # For now, assume EDT (summer time) - could be improved with proper timezone library
-            eastern_time = utc_time - timedelta(hours=4)  # EDT conversion
-            
-            return eastern_time
+            # A slate only has a handful of distinct start times, so this is cached
+            return _utc_to_eastern(utc_time_str)
             
         except Exception as e:
             logger.error(f"Failed to convert UTC time {utc_time_str}: {e}")
             # Fallback: return current time
             return datetime.now()
     
-    def _get(self, endpoint: str, params: Optional[Dict] = None) -> Dict:
-        """Make GET request to MLB API"""
+    def _get_content(self, endpoint: str, params: Optional[Dict] = None,
+                     cache: bool = True) -> Optional[bytes]:
+        """Make GET request to MLB API and return the raw body
+        
+        With cache=False the request is unconditional and the body isn't kept.
+        """
         url = f"{self.base_url}/{endpoint}"
+        key = f"{url}?{urlencode(sorted(params.items()))}" if params else url
+        cached = None
+        if cache:
+            with self._http_cache_lock:
+                cached = self._http_cache.get(key)
+        
         try:
-            response = self.session.get(url, params=params)
+            response = self.session.get(url, params=params, headers=cached[0] if cached else None)
+            if response.status_code == 304 and cached:
+                with self._http_cache_lock:
+                    if key in self._http_cache:
+                        self._http_cache.move_to_end(key)
+                return cached[1]
             response.raise_for_status()
-            return response.json()
         except requests.RequestException as e:
+            logger.error(f"MLB API error: {e}")
+            return None
+        
+        if cache:
+            self._remember_response(key, response)
+        return response.content
+    
+    def _remember_response(self, key: str, response: requests.Response) -> None:
+        """Keep the body and its validators so the next request can be conditional"""
+        validators = {}
+        if response.headers.get('ETag'):
+            validators['If-None-Match'] = response.headers['ETag']
+        if response.headers.get('Last-Modified'):
+            validators['If-Modified-Since'] = response.headers['Last-Modified']
+        
+        with self._http_cache_lock:
+            if not validators:
+                self._http_cache.pop(key, None)
+                return
+            self._http_cache[key] = (validators, response.content)
+            self._http_cache.move_to_end(key)
+            if len(self._http_cache) > HTTP_CACHE_SIZE:
+                self._http_cache.popitem(last=False)
+    
+    def _get(self, endpoint: str, params: Optional[Dict] = None, cache: bool = True) -> Dict:
+        """Make GET request to MLB API"""
+        content = self._get_content(endpoint, params, cache)
+        if content is None:
+            return {}
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError as e:
             logger.error(f"MLB API error: {e}")
             return {}
     
@@ -72,31 +191,56 @@ class MLBAPI:
             return dates[0].get('games', [])
         return []
     
-    def get_game_feed(self, game_id: int) -> Dict:
-        """Get live game feed"""
-        return self._get(f"game/{game_id}/feed/live")
+    def get_game_feed(self, game_id: int, fields: Optional[List[str]] = None) -> Dict:
+        """Get live game feed, optionally only the given JSON pointers
+        
+        With fields, returns {pointer: value} (None for missing paths) so the
+        bulk of the feed (play-by-play) is never turned into Python objects.
+        """
+        endpoint = f"game/{game_id}/feed/live"
+        if not fields:
+            return self._get(endpoint, cache=False)
+        
+        content = self._get_content(endpoint, cache=False)
+        if content is None:
+            return {}
+        
+        try:
+            if simdjson:
+                doc = simdjson.Parser().parse(content)
+                return {field: _simdjson_at(doc, field) for field in fields}
+            
+            data = orjson.loads(content)
+            return {field: _dict_at(data, field) for field in fields}
+        except ValueError as e:
+            logger.error(f"MLB API error: {e}")
+            return {}
     
     def update_teams_in_db(self) -> int:
         """Update all teams in database"""
         teams = self.get_teams()
-        count = 0
         
+        rows = []
         for team in teams:
-            db.execute("""
-                INSERT INTO teams (team_id, team_name, abbreviation, league, division)
-                VALUES (%s, %s, %s, %s, %s)
-                ON CONFLICT (team_id) DO UPDATE SET
-                    team_name = EXCLUDED.team_name,
-                    abbreviation = EXCLUDED.abbreviation,
-                    updated_at = CURRENT_TIMESTAMP
-            """, (
+            league_name = (team.get('league') or {}).get('name') or ''
+            division_name = (team.get('division') or {}).get('name') or ''
+            rows.append((
                 team['id'],
                 team['name'],
-                team.get('abbreviation', '')[:10] if team.get('abbreviation') else '',
-                team.get('league', {}).get('name', '')[:20] if team.get('league', {}).get('name') else '',
-                team.get('division', {}).get('name', '')[:20] if team.get('division', {}).get('name') else ''
+                (team.get('abbreviation') or '')[:10],
+                league_name[:20],
+                division_name[:20]
             ))
-            count += 1
+        
+        db.execute_values("""
+            INSERT INTO teams (team_id, team_name, abbreviation, league, division)
+            VALUES %s
+            ON CONFLICT (team_id) DO UPDATE SET
+                team_name = EXCLUDED.team_name,
+                abbreviation = EXCLUDED.abbreviation,
+                updated_at = CURRENT_TIMESTAMP
+        """, rows)
+        count = len(rows)
         
         logger.info(f"Updated {count} teams")
         return count
@@ -114,48 +258,58 @@ class MLBAPI:
         
         total_players = 0
         
-        for i, (team_id,) in enumerate(teams, 1):
-            try:
-                logger.info(f"Loading roster for team {team_id} ({i}/{len(teams)})")
-                roster = self.get_team_roster(team_id)
-                
-                team_players = 0
-                for player in roster:
-                    person = player.get('person', {})
-                    position = player.get('position', {})
-                    
-                    db.execute("""
-                        INSERT INTO players (
-                            player_id, full_name, first_name, last_name,
-                            position, jersey_number, team_id, status
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, 'Active')
-                        ON CONFLICT (player_id) DO UPDATE SET
-                            team_id = EXCLUDED.team_id,
-                            position = EXCLUDED.position,
-                            jersey_number = EXCLUDED.jersey_number,
-                            status = 'Active',
-                            updated_at = CURRENT_TIMESTAMP
-                    """, (
-                        person.get('id'),
-                        person.get('fullName'),
-                        person.get('firstName', ''),
-                        person.get('lastName', ''),
-                        position.get('abbreviation', ''),
-                        player.get('jerseyNumber'),
-                        team_id
-                    ))
-                    team_players += 1
-                    total_players += 1
-                
-                logger.info(f"Team {team_id}: loaded {team_players} players")
-                
-            except Exception as e:
-                logger.error(f"Failed to load roster for team {team_id}: {e}")
-                continue
+        with ThreadPoolExecutor(max_workers=ROSTER_FETCH_WORKERS) as executor:
+            futures = {
+                executor.submit(self.get_team_roster, team_id): team_id
+                for (team_id,) in teams
+            }
+            
+            for i, future in enumerate(as_completed(futures), 1):
+                team_id = futures[future]
+                try:
+                    logger.info(f"Loaded roster for team {team_id} ({i}/{len(teams)})")
+                    total_players += self._upsert_roster(team_id, future.result())
+                except Exception as e:
+                    logger.error(f"Failed to load roster for team {team_id}: {e}")
+                    continue
         
         logger.info(f"Updated {total_players} total players")
         return total_players
     
+    def _upsert_roster(self, team_id: int, roster: List[Dict]) -> int:
+        """Write one team's roster to the database"""
+        rows = []
+        for player in roster:
+            person = player.get('person', {})
+            position = player.get('position', {})
+            
+            rows.append((
+                person.get('id'),
+                person.get('fullName'),
+                person.get('firstName', ''),
+                person.get('lastName', ''),
+                position.get('abbreviation', ''),
+                player.get('jerseyNumber'),
+                team_id
+            ))
+        
+        # One round-trip per team instead of one per player
+        db.execute_values("""
+            INSERT INTO players (
+                player_id, full_name, first_name, last_name,
+                position, jersey_number, team_id, status
+            ) VALUES %s
+            ON CONFLICT (player_id) DO UPDATE SET
+                team_id = EXCLUDED.team_id,
+                position = EXCLUDED.position,
+                jersey_number = EXCLUDED.jersey_number,
+                status = 'Active',
+                updated_at = CURRENT_TIMESTAMP
+        """, rows, template="(%s, %s, %s, %s, %s, %s, %s, 'Active')")
+        
+        logger.info(f"Team {team_id}: loaded {len(rows)} players")
+        return len(rows)
+    
     def update_todays_games(self) -> List[Dict]:
         """Update today's games in database with probable pitchers and load rosters"""
         games = self.get_schedule()
@@ -166,101 +320,99 @@ class MLBAPI:
         
         # Collect all team IDs playing today
         todays_teams = set()
+        rows = {}  # keyed by gamePk: ON CONFLICT can't touch a row twice per statement
         
         for game in games:
-            home = game['teams']['home']['team']
-            away = game['teams']['away']['team']
+            home_side = game['teams']['home']
+            away_side = game['teams']['away']
+            home = home_side['team']
+            away = away_side['team']
             
             todays_teams.add(home['id'])
             todays_teams.add(away['id'])
             
             # Get probable pitchers
-            home_pitcher_id = None
-            away_pitcher_id = None
-            
-            if 'probablePitcher' in game['teams']['home']:
-                home_pitcher_id = game['teams']['home']['probablePitcher'].get('id')
-            
-            if 'probablePitcher' in game['teams']['away']:
-                away_pitcher_id = game['teams']['away']['probablePitcher'].get('id')
-            
-            # Get venue ID if available (set to None if venue not in our database)
-            venue_id = game.get('venue', {}).get('id')
-            if venue_id:
-                # Check if venue exists in our database
-                venue_exists = db.fetchone("SELECT 1 FROM venues WHERE venue_id = %s", (venue_id,))
-                if not venue_exists:
-                    venue_id = None  # Don't reference non-existent venue
+            home_pitcher_id = (home_side.get('probablePitcher') or {}).get('id')
+            away_pitcher_id = (away_side.get('probablePitcher') or {}).get('id')
             
             # Convert game time from UTC to Eastern Time
             eastern_game_time = self._convert_utc_to_eastern(game['gameDate'])
             
-            db.execute("""
-                INSERT INTO games (
-                    game_id, game_date, game_time,
-                    home_team_id, away_team_id, venue_id, status,
-                    home_probable_pitcher, away_probable_pitcher,
-                    home_score, away_score
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (game_id) DO UPDATE SET
-                    status = EXCLUDED.status,
-                    home_probable_pitcher = EXCLUDED.home_probable_pitcher,
-                    away_probable_pitcher = EXCLUDED.away_probable_pitcher,
-                    home_score = EXCLUDED.home_score,
-                    away_score = EXCLUDED.away_score,
-                    updated_at = CURRENT_TIMESTAMP
-            """, (
+            rows[game['gamePk']] = (
                 game['gamePk'],
                 datetime.fromisoformat(game['officialDate']).date(),
                 eastern_game_time,  # Now using converted Eastern Time!
                 home['id'],
                 away['id'],
-                venue_id,
+                (game.get('venue') or {}).get('id'),
                 game['status']['detailedState'],
                 home_pitcher_id,
                 away_pitcher_id,
-                game['teams']['home'].get('score', 0),
-                game['teams']['away'].get('score', 0)
-            ))
+                home_side.get('score', 0),
+                away_side.get('score', 0)
+            )
+        
+        # One statement for the whole slate, so it is parsed and planned once.
+        # Venues not in our database become NULL via the join rather than a lookup per game.
+        db.execute_values("""
+            INSERT INTO games (
+                game_id, game_date, game_time,
+                home_team_id, away_team_id, venue_id, status,
+                home_probable_pitcher, away_probable_pitcher,
+                home_score, away_score
+            )
+            SELECT
+                g.game_id, g.game_date, g.game_time,
+                g.home_team_id, g.away_team_id, v.venue_id, g.status,
+                g.home_probable_pitcher, g.away_probable_pitcher,
+                g.home_score, g.away_score
+            FROM (VALUES %s) AS g (
+                game_id, game_date, game_time,
+                home_team_id, away_team_id, venue_id, status,
+                home_probable_pitcher, away_probable_pitcher,
+                home_score, away_score
+            )
+            LEFT JOIN venues v ON v.venue_id = g.venue_id
+            ON CONFLICT (game_id) DO UPDATE SET
+                status = EXCLUDED.status,
+                home_probable_pitcher = EXCLUDED.home_probable_pitcher,
+                away_probable_pitcher = EXCLUDED.away_probable_pitcher,
+                home_score = EXCLUDED.home_score,
+                away_score = EXCLUDED.away_score,
+                updated_at = CURRENT_TIMESTAMP
+        """, list(rows.values()),
+            template="(%s::int, %s::date, %s::timestamp, %s::int, %s::int, %s::int, %s, %s::int, %s::int, %s::int, %s::int)")
         
         logger.info(f"Updated {len(games)} games with probable pitchers")
         
-        # Now update rosters for all teams playing today
+        # Rosters aren't needed for the schedule itself, so load them in the background;
+        # callers that need them can wait on self.roster_refresh
         if todays_teams:
-            logger.info(f"Loading rosters for {len(todays_teams)} teams playing today")
-            self.update_rosters_in_db(teams_only=list(todays_teams))
+            logger.info(f"Queueing roster refresh for {len(todays_teams)} teams playing today")
+            self.roster_refresh = _background.submit(self.update_rosters_in_db, list(todays_teams))
+            self.roster_refresh.add_done_callback(_log_roster_refresh_failure)
         
         return games
     
+    def wait_for_roster_refresh(self) -> None:
+        """Block until the roster refresh queued by update_todays_games has finished"""
+        if self.roster_refresh:
+            self.roster_refresh.result()
+    
     def is_data_fresh(self) -> Dict[str, Any]:
         """Check if MLB data is fresh (from today)"""
         from datetime import date
         
         today = date.today()
         
-        # Check if we have games for today
-        today_games = db.fetchone(
-            "SELECT COUNT(*) FROM games WHERE game_date = %s", 
-            (today,)
-        )
-        
-        # Check if we have games from previous days
-        old_games = db.fetchone(
-            "SELECT COUNT(*) FROM games WHERE game_date < %s", 
-            (today,)
-        )
-        
-        # Check last update timestamp for teams/players
-        last_team_update = db.fetchone(
-            "SELECT MAX(updated_at) FROM teams"
-        )
-        
-        last_player_update = db.fetchone(
-            "SELECT MAX(updated_at) FROM players"
-        )
-        
-        today_games_count = today_games[0] if today_games else 0
-        old_games_count = old_games[0] if old_games else 0
+        # Today's/previous game counts and last teams/players update in one round-trip
+        today_games_count, old_games_count, last_team_update, last_player_update = db.fetchone("""
+            SELECT
+                (SELECT COUNT(*) FROM games WHERE game_date = %s),
+                (SELECT COUNT(*) FROM games WHERE game_date < %s),
+                (SELECT MAX(updated_at) FROM teams),
+                (SELECT MAX(updated_at) FROM players)
+        """, (today, today))
         
         # Data is fresh if we have today's games and recent updates
         is_fresh = today_games_count > 0
@@ -270,8 +422,8 @@ class MLBAPI:
             'today_games': today_games_count,
             'old_games': old_games_count,
             'today_date': today,
-            'last_team_update': last_team_update[0] if last_team_update and last_team_update[0] else None,
-            'last_player_update': last_player_update[0] if last_player_update and last_player_update[0] else None,
+            'last_team_update': last_team_update,
+            'last_player_update': last_player_update,
             'needs_refresh': not is_fresh or today_games_count == 0
         }
     
@@ -286,8 +438,9 @@ class MLBAPI:
                 # Update teams first
                 self.update_teams_in_db()
                 
-                # Update today's games and rosters
+                # Update today's games, then wait for their rosters so callers see complete data
                 games = self.update_todays_games()
+                self.wait_for_roster_refresh()
                 
                 logger.info(f"Auto-refresh completed: {len(games)} games loaded for today")
                 return True
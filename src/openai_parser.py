@@ -1,8 +1,11 @@
 """OpenAI-powered bet parsing"""
 
+import re
 import openai
-import json
-from typing import Dict, Optional
+import orjson
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
 import logging
 from src.config import Config
 from src.database import db
@@ -12,62 +15,105 @@ logger = logging.getLogger(__name__)
 # Set OpenAI API key
 openai.api_key = Config.OPENAI_API_KEY
 
+# Parsed bets kept per normalized input (reposts differ only in case/spacing)
+PARSE_CACHE_SIZE = 1024
+
+# Fast-path grammar for the common bet shapes; anything else goes to OpenAI
+_NAME = r"(?P<name>[a-zà-ÿ .'-]+?)"
+_ODDS_UNITS = r"\s+(?P<odds>[+-]\d{3,4})\s+(?P<units>\d+(?:\.\d+)?)\s*u(?:nits?)?$"
+MONEYLINE_PATTERN = re.compile(_NAME + r"\s+(?:ml|moneyline)" + _ODDS_UNITS)
+SPREAD_PATTERN = re.compile(_NAME + r"\s+(?P<target>[+-]\d+(?:\.\d+)?)" + _ODDS_UNITS)
+TOTAL_PATTERN = re.compile(
+    r"(?:" + _NAME + r"\s+)?(?P<operator>over|under|o|u)\s*(?P<target>\d+(?:\.\d+)?)(?:\s*runs?)?" + _ODDS_UNITS
+)
+PROP_PATTERN = re.compile(
+    _NAME + r"\s+(?:(?P<operator>over|under|o|u)\s*)?(?P<target>\d+(?:\.\d+)?)(?P<plus>\+)?\s*"
+    r"(?P<stat>hrs?|home runs?|hits?|ks?|strikeouts?|rbis?|sbs?|stolen bases?)" + _ODDS_UNITS
+)
+
+PROP_BET_TYPES = {
+    'hr': 'HRs', 'hrs': 'HRs', 'home run': 'HRs', 'home runs': 'HRs',
+    'hit': 'Hits', 'hits': 'Hits',
+    'k': 'Ks', 'ks': 'Ks', 'strikeout': 'Ks', 'strikeouts': 'Ks',
+    'rbi': 'RBIs', 'rbis': 'RBIs',
+    'sb': 'SBs', 'sbs': 'SBs', 'stolen base': 'SBs', 'stolen bases': 'SBs'
+}
+OPERATORS = {'over': 'over', 'o': 'over', 'under': 'under', 'u': 'under'}
+
+PARSED_BET_FUNCTION = {
+    "name": "record_bet",
+    "description": "Record a parsed MLB bet",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "player_name": {"type": ["string", "null"], "description": "Full player name"},
+            "team_name": {"type": ["string", "null"], "description": "Full team name"},
+            "bet_type": {
+                "type": "string",
+                "enum": ["Moneyline", "Spread", "HRs", "Hits", "Ks", "RBIs", "SBs", "Total"]
+            },
+            "target_value": {"type": ["number", "null"]},
+            "operator": {"type": ["string", "null"], "enum": ["over", "under", "exactly", None]},
+            "odds": {"type": "string", "description": "American odds, e.g. -110"},
+            "units": {"type": "number"},
+            "confidence": {"type": "integer", "minimum": 0, "maximum": 100},
+            "interpretation": {"type": "string", "description": "Plain English explanation"}
+        },
+        "required": [
+            "player_name", "team_name", "bet_type", "target_value", "operator",
+            "odds", "units", "confidence", "interpretation"
+        ]
+    }
+}
 
 class BetParser:
     """Parse bet strings using OpenAI"""
     
+    # Shared across instances - team list and name -> id mappings are stable
+    # within a run. Only hits are memoized so a roster refresh can fill misses.
+    _teams_context: Optional[str] = None
+    _teams: List[Tuple[str, str]] = []
+    _player_ids: Dict[str, int] = {}
+    _team_ids: Dict[str, int] = {}
+    _parse_cache: 'OrderedDict[str, Dict]' = OrderedDict()
+    _parse_cache_lock = Lock()
+    
     def __init__(self):
         self.teams_cache = self._load_teams()
         
-    def _load_teams(self) -> str:
+    @classmethod
+    def _load_teams(cls) -> str:
         """Load teams for context"""
+        if BetParser._teams_context:
+            return BetParser._teams_context
+        
         teams = db.fetchall("SELECT team_name, abbreviation FROM teams LIMIT 30")
-        return ", ".join([f"{name} ({abbr})" for name, abbr in teams])
+        BetParser._teams = teams
+        BetParser._teams_context = ", ".join([f"{name} ({abbr})" for name, abbr in teams])
+        return BetParser._teams_context
     
     def parse(self, raw_input: str) -> Dict:
-        """Parse a bet string using OpenAI"""
+        """Parse a bet string, trying local rules before OpenAI"""
         
-        prompt = f"""
-        Parse this MLB bet into structured JSON format.
-        
-        Bet input: "{raw_input}"
-        
-        MLB Teams include: {self.teams_cache}
-        
-        Return ONLY a valid JSON object with these exact fields:
-        {{
-            "player_name": "full player name or null",
-            "team_name": "full team name or null",
-            "bet_type": "one of: Moneyline, Spread, HRs, Hits, Ks, RBIs, SBs, Total",
-            "target_value": number or null,
-            "operator": "over, under, exactly, or null",
-            "odds": "-110 format",
-            "units": number,
-            "confidence": 0-100,
-            "interpretation": "plain English explanation"
-        }}
-        """
+        # Reposted bets differ only in case/spacing, so normalize for the cache
+        normalized = " ".join(raw_input.lower().split())
         
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an MLB betting expert. Return only valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,
-                max_tokens=500
-            )
-            
-            content = response.choices[0].message.content
+            with self._parse_cache_lock:
+                cached = self._parse_cache.get(normalized)
+                if cached is not None:
+                    self._parse_cache.move_to_end(normalized)
+            if cached is not None:
+                return dict(cached)
             
-            # Clean JSON if needed
-            if "```" in content:
-                content = content.split("```")[1].replace("json", "").strip()
-                if "```" in content:
-                    content = content.split("```")[0]
-            
-            return json.loads(content)
+            # The regexes see the normalized text; OpenAI gets what the user typed.
+            # Failures raise so they aren't cached.
+            result = self._parse_with_rules(normalized) or self._parse_with_openai(raw_input)
+            with self._parse_cache_lock:
+                self._parse_cache[normalized] = result
+                if len(self._parse_cache) > PARSE_CACHE_SIZE:
+                    self._parse_cache.popitem(last=False)
+            return dict(result)
             
         except Exception as e:
             logger.error(f"OpenAI parsing error: {e}")
@@ -83,26 +129,159 @@ class BetParser:
                 "interpretation": raw_input
             }
     
+    @classmethod
+    def _parse_with_rules(cls, raw_input: str) -> Optional[Dict]:
+        """Parse common bet shapes locally; None if the input doesn't fit"""
+        
+        match = MONEYLINE_PATTERN.fullmatch(raw_input)
+        if match:
+            team = cls._match_team(match['name'])
+            if not team:
+                return None
+            return cls._rule_result(match, team_name=team, bet_type='Moneyline')
+        
+        match = PROP_PATTERN.fullmatch(raw_input)
+        if match:
+            player = cls._match_player(match['name'])
+            if not player:
+                return None
+            target = float(match['target'])
+            operator = OPERATORS[match['operator'] or 'over']
+            if match['plus'] or (not match['operator'] and target.is_integer()):
+                # "2+" and a bare "1 HR" mean at least N; hits are checked as
+                # current > target, so that's over N - 0.5
+                if operator != 'over':
+                    return None
+                target -= 0.5
+            return cls._rule_result(
+                match, player_name=player, bet_type=PROP_BET_TYPES[match['stat']],
+                target_value=target, operator=operator
+            )
+        
+        match = SPREAD_PATTERN.fullmatch(raw_input)
+        if match:
+            team = cls._match_team(match['name'])
+            if not team:
+                return None
+            return cls._rule_result(
+                match, team_name=team, bet_type='Spread', target_value=float(match['target'])
+            )
+        
+        match = TOTAL_PATTERN.fullmatch(raw_input)
+        if match:
+            # Game totals may be written with or without a team
+            team = cls._match_team(match['name']) if match['name'] else None
+            if match['name'] and not team:
+                return None
+            return cls._rule_result(
+                match, team_name=team, bet_type='Total',
+                target_value=float(match['target']), operator=OPERATORS[match['operator']]
+            )
+        
+        return None
+    
+    @staticmethod
+    def _rule_result(match: re.Match, player_name: Optional[str] = None,
+                     team_name: Optional[str] = None, bet_type: str = 'Unknown',
+                     target_value: Optional[float] = None, operator: Optional[str] = None) -> Dict:
+        """Build a parse result in the same shape OpenAI returns"""
+        units = float(match['units'])
+        
+        description = [player_name or team_name or 'Game', bet_type]
+        if operator:
+            description.append(operator)
+        if target_value is not None:
+            description.append(f"{target_value:g}")
+        
+        return {
+            "player_name": player_name,
+            "team_name": team_name,
+            "bet_type": bet_type,
+            "target_value": target_value,
+            "operator": operator,
+            "odds": match['odds'],
+            "units": int(units) if units.is_integer() else units,
+            "confidence": 90,
+            "interpretation": f"{' '.join(description)} at {match['odds']} for {match['units']}u"
+        }
+    
+    @classmethod
+    def _match_team(cls, name: str) -> Optional[str]:
+        """Resolve a team nickname/abbreviation to its full name if unambiguous"""
+        key = name.strip()
+        matches = [team for team, abbr in cls._teams if key == (abbr or '').lower() or key in team.lower()]
+        return matches[0] if len(matches) == 1 else None
+    
+    @staticmethod
+    def _match_player(name: str) -> Optional[str]:
+        """Resolve a (partial) player name to an active player's full name if unambiguous"""
+        rows = db.fetchall(
+            "SELECT full_name FROM players WHERE LOWER(full_name) LIKE %s AND status = 'Active' LIMIT 2",
+            (f"%{name.strip()}%",)
+        )
+        return rows[0][0] if len(rows) == 1 else None
+    
+    @classmethod
+    def _parse_with_openai(cls, raw_input: str) -> Dict:
+        """Parse a bet string using OpenAI function calling"""
+        
+        # Static context goes first so repeat requests share a cacheable prefix
+        system_message = (
+            "You are an MLB betting expert. Parse the user's bet by calling record_bet.\n"
+            f"MLB Teams include: {cls._load_teams()}"
+        )
+        
+        response = openai.ChatCompletion.create(
+            model="gpt-3.5-turbo",
+            messages=[
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": raw_input}
+            ],
+            functions=[PARSED_BET_FUNCTION],
+            function_call={"name": PARSED_BET_FUNCTION["name"]},
+            temperature=0.1,
+            max_tokens=200
+        )
+        
+        arguments = response.choices[0].message.function_call.arguments
+        return orjson.loads(arguments)
+    
     def find_player_id(self, player_name: str) -> Optional[int]:
         """Find player ID from name"""
         if not player_name:
             return None
+        
+        key = player_name.lower()
+        if key in self._player_ids:
+            return self._player_ids[key]
             
         result = db.fetchone(
             "SELECT player_id FROM players WHERE LOWER(full_name) LIKE %s",
-            (f"%{player_name.lower()}%",)
+            (f"%{key}%",)
         )
-        return result[0] if result else None
+        if not result:
+            return None
+        
+        self._player_ids[key] = result[0]
+        return result[0]
     
     def find_team_id(self, team_name: str) -> Optional[int]:
         """Find team ID from name"""
         if not team_name:
             return None
+        
+        key = team_name.lower()
+        if key in self._team_ids:
+            return self._team_ids[key]
             
         result = db.fetchone(
             """SELECT team_id FROM teams 
                WHERE LOWER(team_name) LIKE %s 
                OR LOWER(abbreviation) = %s""",
-            (f"%{team_name.lower()}%", team_name.lower())
+            (f"%{key}%", key)
         )
-        return result[0] if result else None
\ No newline at end of file
+        if not result:
+            return None
+        
+        self._team_ids[key] = result[0]
+        return result[0]
\ No newline at end of file
@@ -1,47 +1,193 @@
 """Smart bet validation - Only accept bets for players actually playing today"""
 
+import threading
+from bisect import bisect_right
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, date
+from functools import lru_cache
 from typing import Dict, Optional, List, Tuple
 import logging
 from src.database import db
 from src.openai_parser import BetParser
 
+# Optional: typo-tolerant name suggestions
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:
+    process = None
+
 logger = logging.getLogger(__name__)
 
+# Minimum WRatio score for a rapidfuzz "did you mean" suggestion
+FUZZY_SCORE_CUTOFF = 75
+
+# Stale-data refreshes run here, one at a time, off the bet-processing path
+_refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mlb-refresh')
+_refresh_lock = threading.Lock()
+_refresh_future: Optional[Future] = None
+
+
+def _refresh_mlb_data() -> bool:
+    """Refresh MLB games/rosters if they're stale"""
+    from src.mlb_api import MLBAPI
+    return MLBAPI().auto_refresh_if_stale()
+
+
+def _start_mlb_refresh() -> Future:
+    """Start a freshness check/refresh unless one is already in flight"""
+    global _refresh_future
+    with _refresh_lock:
+        if _refresh_future is None or _refresh_future.done():
+            _refresh_future = _refresh_executor.submit(_refresh_mlb_data)
+        return _refresh_future
+
+
+def _wait_for_refresh(refresh: Future) -> bool:
+    """Block on an in-flight refresh; False if it failed"""
+    try:
+        return refresh.result()
+    except Exception as e:
+        logger.error(f"MLB refresh error: {e}")
+        return False
+
+
+def _norm(value: Optional[str]) -> str:
+    """Lowercased, stripped string; '' for None/empty"""
+    return value.strip().lower() if value else ''
+
+
+def _build_token_index(names) -> Dict[str, List[str]]:
+    """Map each word of each (lowercased) name to the names containing it, in order"""
+    index: Dict[str, List[str]] = {}
+    for name in names:
+        for token in name.split():
+            index.setdefault(token, []).append(name)
+    return index
+
+
+def _build_name_screen(names) -> Tuple[List[str], str, List[int]]:
+    """Join names into one newline-separated buffer for substring screening"""
+    names = list(names)
+    offsets = []
+    position = 0
+    for name in names:
+        offsets.append(position)
+        position += len(name) + 1
+    return names, "\n".join(names), offsets
+
+
+def _screen_names(screen: Tuple[List[str], str, List[int]], words: List[str]) -> List[str]:
+    """Names containing any of the words, in their original order"""
+    names, buffer, offsets = screen
+    hits = set()
+    for word in words:
+        position = buffer.find(word)
+        while position != -1:
+            index = bisect_right(offsets, position) - 1
+            hits.add(index)
+            # Resume at the next name; one hit per name is enough
+            next_start = offsets[index + 1] if index + 1 < len(offsets) else len(buffer)
+            position = buffer.find(word, next_start)
+    return [names[index] for index in sorted(hits)]
+
 
 class SmartBetValidator:
     """Intelligent bet validation that checks if players are actually playing today"""
     
+    # Most recently loaded context, shared by all validators: signature -> context tuple
+    _ctx_cache: Dict[tuple, tuple] = {}
+    _CONTEXT_ATTRS = (
+        'todays_games', 'probable_pitchers', '_players', '_player_name_idx', '_games_by_team',
+        '_pitcher_token_index', '_player_token_index', '_pitcher_screen', '_player_screen',
+        '_team_lookup', '_team_keys'
+    )
+    
     def __init__(self):
         self.parser = BetParser()
         self.todays_games = []
         self.probable_pitchers = {}
-        self.active_players = {}
+        self._players = []  # active player rows for today's teams
+        self._player_name_idx = {}  # lowercased full name -> index into _players
+        self._games_by_team = {}  # team_id -> first game today
+        self._pitcher_token_index = {}
+        self._player_token_index = {}
+        self._pitcher_screen = ([], '', [])
+        self._player_screen = ([], '', [])
+        self._team_lookup = {}
+        self._team_keys = []
+        self._ctx_signature = None
+    
+    def _context_signature(self) -> Optional[tuple]:
+        """Cheap probe that changes whenever today's games or the rosters are rewritten"""
+        today = date.today()
+        try:
+            probe = db.fetchone("""
+                SELECT COUNT(*), MAX(updated_at), (SELECT MAX(updated_at) FROM players)
+                FROM games
+                WHERE game_date = %s
+            """, (today,))
+        except Exception as e:
+            logger.warning(f"Context probe failed, reloading: {e}")
+            return None
+        return (today,) + tuple(probe)
     
     def load_todays_context(self) -> bool:
         """Load today's games, probable pitchers, and active players"""
         try:
             # Get today's games (use actual today, not database CURRENT_DATE due to timezone issues)
+            # and the active players on those teams in one round-trip, tagged by kind
             today = date.today()
-            self.todays_games = db.fetch_dict("""
-                SELECT 
-                    g.*,
-                    ht.team_name as home_team_name,
-                    ht.abbreviation as home_abbr,
-                    at.team_name as away_team_name,
-                    at.abbreviation as away_abbr,
-                    hp.full_name as home_pitcher_name,
-                    ap.full_name as away_pitcher_name
-                FROM games g
-                JOIN teams ht ON g.home_team_id = ht.team_id
-                JOIN teams at ON g.away_team_id = at.team_id
-                LEFT JOIN players hp ON g.home_probable_pitcher = hp.player_id
-                LEFT JOIN players ap ON g.away_probable_pitcher = ap.player_id
-                WHERE g.game_date = %s
-            """, (today,))
+            rows = db.iter_prepared('todays_context', """
+                WITH tg AS (
+                    SELECT 
+                        g.*,
+                        ht.team_name as home_team_name,
+                        ht.abbreviation as home_abbr,
+                        at.team_name as away_team_name,
+                        at.abbreviation as away_abbr,
+                        hp.full_name as home_pitcher_name,
+                        ap.full_name as away_pitcher_name
+                    FROM games g
+                    JOIN teams ht ON g.home_team_id = ht.team_id
+                    JOIN teams at ON g.away_team_id = at.team_id
+                    LEFT JOIN players hp ON g.home_probable_pitcher = hp.player_id
+                    LEFT JOIN players ap ON g.away_probable_pitcher = ap.player_id
+                    WHERE g.game_date = $1
+                )
+                SELECT 'game' AS kind, row_to_json(tg) AS data FROM tg
+                UNION ALL
+                SELECT 'player', row_to_json(tp) FROM (
+                    SELECT p.*, t.team_name, t.abbreviation
+                    FROM players p
+                    JOIN teams t ON p.team_id = t.team_id
+                    WHERE p.team_id IN (SELECT home_team_id FROM tg UNION SELECT away_team_id FROM tg)
+                    AND p.status = 'Active'
+                ) tp
+            """, (today,), dict_cursor=True)
             
-            # Build pitcher lookup
+            self.todays_games = []
+            self.probable_pitchers = {}
+            self._players = []
+            self._player_name_idx = {}
+            
+            # Split games from active players in today's games in one pass over the cursor
+            for row in rows:
+                if row['kind'] == 'game':
+                    self.todays_games.append(row['data'])
+                else:
+                    player = row['data']
+                    self._player_name_idx[player['full_name'].lower()] = len(self._players)
+                    self._players.append(player)
+            
+            # Build the per-game lookups in a single pass: team -> game, probable pitchers,
+            # and lowercased team names/abbreviations (the first game wins for doubleheaders)
+            self._games_by_team = {}
+            self._team_lookup = {}
+            self._team_keys = []
             for game in self.todays_games:
+                self._games_by_team.setdefault(game['home_team_id'], game)
+                self._games_by_team.setdefault(game['away_team_id'], game)
+                
                 if game.get('home_pitcher_name'):
                     self.probable_pitchers[game['home_pitcher_name'].lower()] = {
                         'game_id': game['game_id'],
@@ -56,31 +202,24 @@ class SmartBetValidator:
                         'opponent': game['home_team_name'],
                         'player_id': game['away_probable_pitcher']
                     }
-            
-            # Get active players in today's games
-            if self.todays_games:
-                team_ids = []
-                for game in self.todays_games:
-                    team_ids.extend([game['home_team_id'], game['away_team_id']])
                 
-                if team_ids:
-                    players = db.fetch_dict("""
-                        SELECT p.*, t.team_name, t.abbreviation
-                        FROM players p
-                        JOIN teams t ON p.team_id = t.team_id
-                        WHERE p.team_id = ANY(%s)
-                        AND p.status = 'Active'
-                    """, (team_ids,))
-                    
-                    for player in players:
-                        key = player['full_name'].lower()
-                        self.active_players[key] = player
+                keys = tuple((game.get(field) or '').lower()
+                             for field in ('home_team_name', 'away_team_name', 'home_abbr', 'away_abbr'))
+                self._team_keys.append((keys, game))
+                for key in keys:
+                    if key:
+                        self._team_lookup.setdefault(key, game)
+            
+            self._pitcher_token_index = _build_token_index(self.probable_pitchers)
+            self._player_token_index = _build_token_index(self._player_name_idx)
+            self._pitcher_screen = _build_name_screen(self.probable_pitchers)
+            self._player_screen = _build_name_screen(self._player_name_idx)
             
-            logger.info(f"Loaded context: {len(self.todays_games)} games, {len(self.probable_pitchers)} pitchers, {len(self.active_players)} players")
+            logger.info(f"Loaded context: {len(self.todays_games)} games, {len(self.probable_pitchers)} pitchers, {len(self._player_name_idx)} players")
             
             # Warn about incomplete data
-            if self.todays_games and len(self.active_players) < len(self.todays_games) * 20:
-                logger.warning(f"Low player count: {len(self.active_players)} players for {len(self.todays_games)} games (expected ~{len(self.todays_games) * 25})")
+            if self.todays_games and len(self._player_name_idx) < len(self.todays_games) * 20:
+                logger.warning(f"Low player count: {len(self._player_name_idx)} players for {len(self.todays_games)} games (expected ~{len(self.todays_games) * 25})")
             
             if self.todays_games and len(self.probable_pitchers) == 0:
                 logger.warning("No probable pitchers loaded - they may not be announced yet")
@@ -111,14 +250,9 @@ class SmartBetValidator:
             validation['errors'].append("❌ No games loaded for today. Please update MLB data first.")
             return validation
         
-        player_name = parsed.get('player_name') or ''
-        player_name = player_name.lower().strip() if player_name else ''
-        
-        team_name = parsed.get('team_name') or ''
-        team_name = team_name.lower().strip() if team_name else ''
-        
-        bet_type = parsed.get('bet_type') or ''
-        bet_type = bet_type.lower() if bet_type else ''
+        player_name = _norm(parsed.get('player_name'))
+        team_name = _norm(parsed.get('team_name'))
+        bet_type = _norm(parsed.get('bet_type'))
         
         # If it's a pitcher bet (strikeouts), validate against probable pitchers
         if bet_type in ['ks', 'strikeouts'] and player_name:
@@ -149,10 +283,8 @@ class SmartBetValidator:
             return validation
         
         # Fuzzy matching for names
-        matches = []
-        for pitcher, info in self.probable_pitchers.items():
-            if any(word in pitcher for word in player_name.split()):
-                matches.append((pitcher, info))
+        matches = [(name, self.probable_pitchers[name]) for name in
+                   self._fuzzy_matches(player_name, self._pitcher_token_index, self._pitcher_screen)]
         
         if matches:
             validation['errors'].append(f"❌ '{player_name.title()}' not found as probable pitcher today")
@@ -169,8 +301,9 @@ class SmartBetValidator:
         """Validate a general player bet"""
         
         # Direct name match
-        if player_name in self.active_players:
-            player_info = self.active_players[player_name]
+        idx = self._player_name_idx.get(player_name)
+        if idx is not None:
+            player_info = self._players[idx]
             
             # Find their game today
             game_context = self._find_player_game(player_info['team_id'])
@@ -184,15 +317,13 @@ class SmartBetValidator:
             return validation
         
         # Fuzzy matching
-        matches = []
-        for name, info in self.active_players.items():
-            if any(word in name for word in player_name.split()):
-                matches.append((name, info))
+        matches = self._fuzzy_matches(player_name, self._player_token_index, self._player_screen)
         
         if matches:
             validation['errors'].append(f"❌ '{player_name.title()}' not found in today's active rosters")
             validation['suggestions'].append("🎯 Did you mean:")
-            for name, info in matches[:3]:
+            for name in matches[:3]:
+                info = self._players[self._player_name_idx[name]]
                 validation['suggestions'].append(f"   • {name.title()} ({info['team_name']})")
         else:
             validation['errors'].append(f"❌ '{player_name.title()}' not found in any team playing today")
@@ -200,22 +331,38 @@ class SmartBetValidator:
         
         return validation
     
+    def _fuzzy_matches(self, player_name: str, index: Dict[str, List[str]],
+                       screen: Tuple[List[str], str, List[int]]) -> List[str]:
+        """Names sharing a word with player_name, via the token index"""
+        words = player_name.split()
+        candidates = dict.fromkeys(name for word in words for name in index.get(word, ()))
+        if not candidates and process:
+            # Typos and partial names ("otani", "judg"), best match first
+            candidates = [match[0] for match in process.extract(
+                player_name, screen[0], scorer=fuzz.WRatio, limit=3, score_cutoff=FUZZY_SCORE_CUTOFF
+            )]
+        if not candidates:
+            # Partial words ("judg") only match by substring, screened over the joined names
+            candidates = _screen_names(screen, words)
+        return list(candidates)
+    
     def _validate_team_bet(self, team_name: str, validation: Dict) -> Dict:
         """Validate a team bet"""
         
-        for game in self.todays_games:
-            if (team_name in game['home_team_name'].lower() or 
-                team_name in game['away_team_name'].lower() or
-                team_name in game.get('home_abbr', '').lower() or
-                team_name in game.get('away_abbr', '').lower()):
-                
-                validation['valid'] = True
-                validation['game_context'] = {
-                    'game_id': game['game_id'],
-                    'matchup': f"{game['away_team_name']} @ {game['home_team_name']}"
-                }
-                validation['suggestions'].append(f"✅ Found game: {game['away_team_name']} @ {game['home_team_name']}")
-                return validation
+        # Exact name/abbreviation first, then partial names ("phillies") by substring
+        game = self._team_lookup.get(team_name)
+        if not game:
+            game = next((game for keys, game in self._team_keys
+                         if any(team_name in key for key in keys)), None)
+        
+        if game:
+            validation['valid'] = True
+            validation['game_context'] = {
+                'game_id': game['game_id'],
+                'matchup': f"{game['away_team_name']} @ {game['home_team_name']}"
+            }
+            validation['suggestions'].append(f"✅ Found game: {game['away_team_name']} @ {game['home_team_name']}")
+            return validation
         
         validation['errors'].append(f"❌ '{team_name.title()}' is not playing today")
         self._add_todays_game_suggestions(validation)
@@ -223,13 +370,13 @@ class SmartBetValidator:
     
     def _find_player_game(self, team_id: int) -> Optional[Dict]:
         """Find the game for a player's team"""
-        for game in self.todays_games:
-            if game['home_team_id'] == team_id or game['away_team_id'] == team_id:
-                return {
-                    'game_id': game['game_id'],
-                    'matchup': f"{game['away_team_name']} @ {game['home_team_name']}"
-                }
-        return None
+        game = self._games_by_team.get(team_id)
+        if not game:
+            return None
+        return {
+            'game_id': game['game_id'],
+            'matchup': f"{game['away_team_name']} @ {game['home_team_name']}"
+        }
     
     def _add_todays_pitcher_suggestions(self, validation: Dict):
         """Add suggestions for today's probable pitchers"""
@@ -245,19 +392,41 @@ class SmartBetValidator:
             for game in self.todays_games:  # Show all games, not just first 5
                 validation['suggestions'].append(f"   • {game['away_team_name']} @ {game['home_team_name']}")
     
+    def _ensure_context(self) -> bool:
+        """Reload today's context only when the probe shows the data has changed"""
+        signature = self._context_signature()
+        if signature is not None and signature == self._ctx_signature:
+            return True
+        
+        cached = self._ctx_cache.get(signature) if signature else None
+        if cached:
+            for attr, value in zip(self._CONTEXT_ATTRS, cached):
+                setattr(self, attr, value)
+        elif self.load_todays_context():
+            if signature:
+                SmartBetValidator._ctx_cache = {
+                    signature: tuple(getattr(self, attr) for attr in self._CONTEXT_ATTRS)
+                }
+        else:
+            return False
+        
+        self._ctx_signature = signature
+        return True
+    
     def process_bet(self, raw_input: str, community: str = 'StatEdge') -> Dict:
         """Process a bet with full validation and auto-refresh if needed"""
         
-        # Check if MLB data needs refreshing before validation
-        from src.mlb_api import MLBAPI
-        mlb_api = MLBAPI()
+        # Check MLB data freshness in the background rather than before every bet
+        refresh = _start_mlb_refresh()
         
-        # Auto-refresh if data is stale
-        if not mlb_api.auto_refresh_if_stale():
-            logger.warning("Auto-refresh failed, but continuing with existing data")
+        context_loaded = self._ensure_context()
+        if context_loaded and not self.todays_games:
+            # Nothing to validate against yet, so this bet has to wait for the refresh
+            if not _wait_for_refresh(refresh):
+                logger.warning("Auto-refresh failed, but continuing with existing data")
+            context_loaded = self._ensure_context()
         
-        # Always reload today's context to ensure fresh data
-        if not self.load_todays_context():
+        if not context_loaded:
             return {
                 'success': False,
                 'error': 'Failed to load today\'s MLB data',
@@ -271,4 +440,10 @@ class SmartBetValidator:
             'success': validation['valid'],
             'validation': validation,
             'game_context': validation.get('game_context')
-        }
\ No newline at end of file
+        }
+
+
+@lru_cache(maxsize=1)
+def get_validator() -> SmartBetValidator:
+    """Shared validator, so its parser and loaded context are reused across bets"""
+    return SmartBetValidator()
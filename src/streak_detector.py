@@ -2,7 +2,7 @@
 
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Tuple
 from src.database import db
 
 logger = logging.getLogger(__name__)
@@ -11,6 +11,12 @@ logger = logging.getLogger(__name__)
 class StreakDetector:
     """Detect winning streaks and trigger cross-tier notifications"""
     
+    # Tiers notified for a streak in each tier: Premium -> Free, Plus, Premium; Plus -> Free, Plus
+    _TIER_FANOUT: Dict[int, Tuple[int, ...]] = {3: (1, 2, 3), 2: (1, 2), 1: (1,)}
+    
+    # Newest settled_at covered by a completed scan in this process
+    _last_settled_seen = None
+    
     def __init__(self):
         self.streak_threshold = 3  # 3 consecutive wins triggers notification
         
@@ -18,51 +24,61 @@ class StreakDetector:
         """Check all communities for active winning streaks"""
         streaks = []
         
-        # Check each community
-        communities = db.fetch_dict("SELECT * FROM communities WHERE active = true")
+        # Nothing can have changed if no bet has settled since the last scan
+        latest = db.fetchone("SELECT MAX(settled_at) FROM bets WHERE status IN ('Won', 'Lost')")
+        latest_settled = latest[0] if latest else None
+        if latest_settled is None or latest_settled == StreakDetector._last_settled_seen:
+            return streaks
+        
+        # Check each community, or only those with new settlements after the first scan
+        if StreakDetector._last_settled_seen is None:
+            communities = db.fetchall("SELECT community_id FROM communities WHERE active = true")
+        else:
+            communities = db.fetchall("""
+                SELECT DISTINCT c.community_id
+                FROM communities c
+                JOIN bets b ON b.community_id = c.community_id
+                WHERE c.active = true
+                AND b.status IN ('Won', 'Lost')
+                AND b.settled_at > %s
+            """, (StreakDetector._last_settled_seen,))
         
-        for community in communities:
-            streak = self.check_community_streak(community['community_id'])
+        for (community_id,) in communities:
+            streak = self.check_community_streak(community_id)
             if streak and streak['is_active']:
                 streaks.append(streak)
-                
+        
+        StreakDetector._last_settled_seen = latest_settled
         return streaks
     
     def check_community_streak(self, community_id: int) -> Dict:
         """Check if a specific community has an active winning streak"""
         
-        # Get recent bets for this community
-        recent_bets = db.fetch_dict("""
-            SELECT 
-                bet_id,
-                status,
-                created_at,
-                settled_at,
-                raw_input,
-                odds,
-                units
-            FROM bets
-            WHERE community_id = %s
-            AND status IN ('Won', 'Lost')
-            AND settled_at >= CURRENT_DATE - INTERVAL '7 days'
-            ORDER BY settled_at DESC
-            LIMIT 10
-        """, (community_id,))
-        
-        if not recent_bets:
-            return {'is_active': False}
-        
-        # Count consecutive wins from most recent
-        consecutive_wins = 0
-        winning_bets = []
-        
-        for bet in recent_bets:
-            if bet['status'] == 'Won':
-                consecutive_wins += 1
-                winning_bets.append(bet)
-            else:
-                # Hit a loss, stop counting
-                break
+        # Get the unbroken run of wins (up to the last 10 settled bets), most recent first
+        winning_bets = db.fetch_prepared('streak_winning_run', """
+            WITH recent AS (
+                SELECT 
+                    bet_id,
+                    status,
+                    created_at,
+                    settled_at,
+                    raw_input,
+                    odds,
+                    units,
+                    row_number() OVER (ORDER BY settled_at DESC) AS rn
+                FROM bets
+                WHERE community_id = $1
+                AND status IN ('Won', 'Lost')
+                AND settled_at >= CURRENT_DATE - INTERVAL '7 days'
+            )
+            SELECT bet_id, status, created_at, settled_at, raw_input, odds, units
+            FROM recent
+            WHERE rn <= 10
+            AND rn < COALESCE((SELECT MIN(rn) FROM recent WHERE status = 'Lost'), 11)
+            ORDER BY rn
+        """, (community_id,), dict_cursor=True)
+        
+        consecutive_wins = len(winning_bets)
         
         # Check if we have an active streak
         if consecutive_wins >= self.streak_threshold:
@@ -93,35 +109,31 @@ class StreakDetector:
             logger.info(f"Streak already notified for community {streak['community_id']}")
             return 0
         
-        # Get community details
-        community = db.fetchone("""
-            SELECT community_name, tier_level 
+        # Get the source community and one community per tier in a single query
+        communities = db.fetch_prepared('streak_communities', """
+            SELECT community_id, community_name, tier_level 
             FROM communities 
-            WHERE community_id = %s
-        """, (streak['community_id'],))
+            WHERE community_id = $1 OR tier_level = ANY($2)
+            ORDER BY community_id
+        """, (streak['community_id'], list(self._TIER_FANOUT)))
         
+        community = next((row for row in communities if row[0] == streak['community_id']), None)
         if not community:
             return 0
         
-        community_name, tier_level = community
-        messages_queued = 0
+        _, community_name, tier_level = community
+        
+        tier_communities = {}
+        for target_id, target_name, target_tier in communities:
+            tier_communities.setdefault(target_tier, (target_id, target_name))
         
-        # Determine which communities to notify
-        target_communities = []
-        if tier_level == 3:  # Premium
-            target_communities = [1, 2, 3]  # Notify Free, Plus, Premium
-        elif tier_level == 2:  # Plus
-            target_communities = [1, 2]  # Notify Free, Plus
-        else:  # Free
-            target_communities = [1]  # Notify Free only
+        # Determine which communities to notify (anything else notifies Free only)
+        target_communities = self._TIER_FANOUT.get(tier_level, (1,))
         
-        # Queue messages for each target community
+        # Build messages for each target community
+        new_messages = []
         for target_tier in target_communities:
-            target_community = db.fetchone("""
-                SELECT community_id, community_name 
-                FROM communities 
-                WHERE tier_level = %s
-            """, (target_tier,))
+            target_community = tier_communities.get(target_tier)
             
             if target_community:
                 target_id, target_name = target_community
@@ -132,24 +144,24 @@ class StreakDetector:
                 
                 if target_tier < tier_level:
                     # Cross-tier notification
-                    content = f"{community_name} members are on fire with {consecutive_wins} straight wins! 🎯\n\n"
-                    content += "Recent wins:\n"
-                    for bet in streak['winning_bets'][:3]:
-                        content += f"• {bet['raw_input']} ✅\n"
-                    content += f"\nWant access to {community_name} picks? Upgrade now!"
+                    parts = [
+                        f"{community_name} members are on fire with {consecutive_wins} straight wins! 🎯",
+                        "",
+                        "Recent wins:"
+                    ]
+                    parts.extend(f"• {bet['raw_input']} ✅" for bet in streak['winning_bets'][:3])
+                    parts.append("")
+                    parts.append(f"Want access to {community_name} picks? Upgrade now!")
                 else:
                     # Same-tier notification
-                    content = f"We're on a {consecutive_wins}-bet winning streak! 🔥\n\n"
-                    content += "Keep the momentum going!"
+                    parts = [
+                        f"We're on a {consecutive_wins}-bet winning streak! 🔥",
+                        "",
+                        "Keep the momentum going!"
+                    ]
+                content = "\n".join(parts)
                 
-                # Queue the message
-                db.execute("""
-                    INSERT INTO message_log (
-                        community_id, message_type, message_title,
-                        message_content, priority_level,
-                        scheduled_send_time
-                    ) VALUES (%s, %s, %s, %s, %s, %s)
-                """, (
+                new_messages.append((
                     target_id,
                     'streak',
                     title,
@@ -157,8 +169,16 @@ class StreakDetector:
                     3,  # High priority for streaks
                     datetime.now()
                 ))
-                
-                messages_queued += 1
                 logger.info(f"Queued streak notification for {target_name}")
         
+        # Queue all messages in one round-trip
+        db.execute_values("""
+            INSERT INTO message_log (
+                community_id, message_type, message_title,
+                message_content, priority_level,
+                scheduled_send_time
+            ) VALUES %s
+        """, new_messages)
+        messages_queued = len(new_messages)
+        
         return messages_queued
\ No newline at end of file
@@ -4,15 +4,32 @@ import os
 import asyncio
 import aiohttp
 import logging
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
+# One keep-alive pool for all forum posts; the three tier posts can run side by side
+CONNECTOR_LIMIT_PER_HOST = 8
+KEEPALIVE_TIMEOUT = 60
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10, connect=3)
+
+# Most createForumPost mutations sent in one aliased GraphQL request
+BATCH_MAX = 10
+
+# GraphQL mutation for a single forum post with field selections
+CREATE_FORUM_POST_MUTATION = """
+mutation CreateForumPost($input: CreateForumPostInput!) {
+    createForumPost(input: $input) {
+        id
+    }
+}
+"""
+
 
 class WhopGraphQLClient:
     """Async Whop GraphQL API integration"""
     
-    def __init__(self):
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None):
         self.api_key = os.getenv('WHOP_API_KEY')
         self.company_id = os.getenv('NEXT_PUBLIC_WHOP_COMPANY_ID')
         self.agent_user_id = os.getenv('NEXT_PUBLIC_WHOP_AGENT_USER_ID')
@@ -23,7 +40,11 @@ class WhopGraphQLClient:
         self.premium_experience_id = os.getenv('PREMIUM_EXPERIENCE_ID')
         
         self.graphql_url = "https://api.whop.com/public-graphql"
-        self.session = None
+        
+        # A caller-provided session is shared, so auth headers go on each request instead
+        self.session = session
+        self._owns_session = session is None
+        self._request_headers = None if session is None else self._get_headers()
         
     def _get_headers(self) -> Dict:
         """Get authentication headers with CRITICAL fixes"""
@@ -34,19 +55,42 @@ class WhopGraphQLClient:
             "Content-Type": "application/json"
         }
     
-    async def initialize(self):
-        """Initialize async HTTP session"""
+    async def initialize(self, verify: bool = False):
+        """Initialize async HTTP session
+        
+        Auth problems surface on the first post; pass verify=True to probe up front.
+        """
         if not self.session:
-            self.session = aiohttp.ClientSession()
-            
-        # Test connection
-        await self._test_connection()
+            connector = aiohttp.TCPConnector(
+                limit_per_host=CONNECTOR_LIMIT_PER_HOST,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=300
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=REQUEST_TIMEOUT,
+                headers=self._get_headers()
+            )
+            # Ours now, even if a caller's session was here before close()
+            self._owns_session = True
+            self._request_headers = None
+        
+        if verify:
+            await self._test_connection()
     
     async def close(self):
-        """Close async HTTP session"""
-        if self.session:
+        """Close async HTTP session (a caller-provided session is left open)"""
+        if self.session and self._owns_session:
             await self.session.close()
-            self.session = None
+        self.session = None
+    
+    async def __aenter__(self):
+        await self.initialize()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
     async def _test_connection(self):
         """Test GraphQL connection with simple query"""
         test_query = """
@@ -59,7 +103,7 @@ class WhopGraphQLClient:
             async with self.session.post(
                 self.graphql_url,
                 json={"query": test_query},
-                headers=self._get_headers()
+                headers=self._request_headers
             ) as response:
                 if response.status == 200:
                     data = await response.json()
@@ -103,6 +147,108 @@ class WhopGraphQLClient:
             community_name="StatEdge Premium"
         )
     
+    async def post_all(self, title: str, content: str, paywall_amount: float = 19.99) -> Dict[str, bool]:
+        """Post the same bet to every tier concurrently"""
+        free, vip, premium = await asyncio.gather(
+            self.post_free_bet(title, content),
+            self.post_vip_bet(title, content),
+            self.post_premium_bet(title, content, paywall_amount)
+        )
+        return {'free': free, 'vip': vip, 'premium': premium}
+    
+    async def post_bets_batch(self, posts: List[Dict]) -> List[bool]:
+        """Create several forum posts with aliased mutations, one request per BATCH_MAX posts
+        
+        Each post is a dict with experience_id, title, content, community_name and an
+        optional paywall_amount. Returns per-post success in the same order.
+        """
+        chunks = [posts[start:start + BATCH_MAX] for start in range(0, len(posts), BATCH_MAX)]
+        
+        # Chunks are independent requests on the shared pool, so send them together
+        outcomes = await asyncio.gather(*(self._post_batch(chunk) for chunk in chunks),
+                                        return_exceptions=True)
+        
+        results = []
+        for chunk, outcome in zip(chunks, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Batch post failed: {outcome}")
+                outcome = [False] * len(chunk)
+            results.extend(outcome)
+        return results
+    
+    async def _post_batch(self, posts: List[Dict]) -> List[bool]:
+        """Send one aliased createForumPost request for up to BATCH_MAX posts"""
+        results = [False] * len(posts)
+        aliases = {}
+        variables = {}
+        
+        for i, post in enumerate(posts):
+            if not post.get('experience_id'):
+                logger.error(f"No experience ID for {post['community_name']}")
+                continue
+            aliases[f"p{i}"] = i
+            variables[f"i{i}"] = self._forum_post_input(
+                post['experience_id'], post['title'], post['content'], post.get('paywall_amount')
+            )
+        
+        if not aliases:
+            return results
+        
+        params = ", ".join(f"$i{i}: CreateForumPostInput!" for i in aliases.values())
+        fields = " ".join(f"{alias}: createForumPost(input: $i{i}) {{ id }}" for alias, i in aliases.items())
+        mutation = f"mutation CreateForumPosts({params}) {{ {fields} }}"
+        
+        try:
+            logger.info(f"Posting {len(aliases)} forum posts in one request")
+            
+            async with self.session.post(
+                self.graphql_url,
+                json={"query": mutation, "variables": variables},
+                headers=self._request_headers
+            ) as response:
+                
+                if response.status != 200:
+                    error_text = await response.text()
+                    logger.error(f"❌ HTTP {response.status} for batched posts: {error_text}")
+                    return results
+                
+                data = await response.json()
+                
+        except Exception as e:
+            logger.error(f"❌ Exception posting batch: {e}")
+            return results
+        
+        # Errors carry the alias of the failed mutation as the first path element
+        for error in data.get('errors') or []:
+            alias = (error.get('path') or [None])[0]
+            community_name = posts[aliases[alias]]['community_name'] if alias in aliases else 'batch'
+            logger.error(f"❌ GraphQL error for {community_name}: {error.get('message', 'Unknown error')}")
+        
+        posted = data.get('data') or {}
+        for alias, i in aliases.items():
+            if posted.get(alias):
+                logger.info(f"✅ Posted to {posts[i]['community_name']}: {posts[i]['title']}")
+                results[i] = True
+        
+        return results
+    
+    def _forum_post_input(self, experience_id: str, title: str, content: str,
+                          paywall_amount: Optional[float] = None) -> Dict:
+        """CreateForumPostInput for one post"""
+        post_input = {
+            "forumExperienceId": experience_id,  # Correct field name
+            "title": title,
+            "content": content
+            # No author_id - inferred from authenticated user
+        }
+        
+        # Add paywall for premium posts
+        if paywall_amount:
+            post_input["paywallAmount"] = paywall_amount  # Correct field name
+            post_input["paywallCurrency"] = "usd"  # Must be lowercase
+        
+        return post_input
+    
     async def _post_to_forum(self, 
                            experience_id: str,
                            title: str, 
@@ -115,36 +261,15 @@ class WhopGraphQLClient:
             logger.error(f"No experience ID for {community_name}")
             return False
         
-        # GraphQL mutation for forum post with field selections
-        mutation = """
-        mutation CreateForumPost($input: CreateForumPostInput!) {
-            createForumPost(input: $input) {
-                id
-            }
-        }
-        """
-        
-        variables = {
-            "input": {
-                "forumExperienceId": experience_id,  # Correct field name
-                "title": title,
-                "content": content
-                # No author_id - inferred from authenticated user
-            }
-        }
-        
-        # Add paywall for premium posts
-        if paywall_amount:
-            variables["input"]["paywallAmount"] = paywall_amount  # Correct field name
-            variables["input"]["paywallCurrency"] = "usd"  # Must be lowercase
+        variables = {"input": self._forum_post_input(experience_id, title, content, paywall_amount)}
         
         try:
             logger.info(f"Posting to {community_name}: {title}")
             
             async with self.session.post(
                 self.graphql_url,
-                json={"query": mutation, "variables": variables},
-                headers=self._get_headers()
+                json={"query": CREATE_FORUM_POST_MUTATION, "variables": variables},
+                headers=self._request_headers
             ) as response:
                 
                 if response.status == 200:
@@ -159,6 +284,10 @@ class WhopGraphQLClient:
                             logger.error(f"  - {error.get('message', 'Unknown error')}")
                     else:
                         logger.error(f"❌ Unexpected response for {community_name}: {data}")
+                elif response.status in (401, 403):
+                    error_text = await response.text()
+                    logger.error(f"❌ Whop auth failed ({response.status}) for {community_name} - "
+                                 f"check WHOP_API_KEY, agent user and company IDs: {error_text}")
                 else:
                     error_text = await response.text()
                     logger.error(f"❌ HTTP {response.status} for {community_name}: {error_text}")
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Test the local bet-parsing rules against expected lines"""
+
+from src.openai_parser import BetParser
+
+# (raw input, bet type, operator, target) - "N" and "N+" props mean at least N,
+# and hits are graded as current > target, so both become over N - 0.5
+PARSE_CASES = (
+    ('Judge 1 HR +300 1u', 'HRs', 'over', 0.5),
+    ('Harper 2+ HRs -110 2u', 'HRs', 'over', 1.5),
+    ('Harper 2 HRs -110 2u', 'HRs', 'over', 1.5),
+    ('Harper over 1.5 hits -120 1u', 'Hits', 'over', 1.5),
+    ('Wheeler over 6 Ks +100 1.5 units', 'Ks', 'over', 6.0),
+    ('Wheeler 6.5 Ks -110 1u', 'Ks', 'over', 6.5),
+)
+
+def test_bet_parser():
+    """Check each case parses to the expected bet type, operator and line"""
+    
+    print("🧾 TESTING BET PARSER RULES")
+    print("=" * 40)
+    
+    parser = BetParser()
+    failures = 0
+    
+    for i, (raw_input, bet_type, operator, target) in enumerate(PARSE_CASES, 1):
+        result = parser.parse(raw_input)
+        got = (result['bet_type'], result['operator'], result['target_value'])
+        
+        print(f"\n{i}. {raw_input}")
+        if got == (bet_type, operator, target):
+            print(f"   ✅ PASS: {bet_type} {operator} {target}")
+        else:
+            failures += 1
+            print(f"   ❌ FAIL:")
+            print(f"       Expected: {bet_type} {operator} {target}")
+            print(f"       Got: {got[0]} {got[1]} {got[2]}")
+    
+    return failures == 0
+
+if __name__ == "__main__":
+    if test_bet_parser():
+        print("\n✅ All parser cases passed!")
+    else:
+        print("\n❌ Some parser cases failed")
\ No newline at end of file
@@ -3,12 +3,46 @@
 
 import os
 import json
-import requests
+import asyncio
+import httpx
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+def tier_test_message(webhook_name):
+    """Create the tier-specific test message for a webhook"""
+    tier = webhook_name.split('_')[-1].lower()
+    
+    if tier == 'free':
+        return {
+            "content": "🎯 **FREE TIER TEST** 👇💰\n\n**TEST: $1,000 Harper HR Slip**\nThis is a test from the MLB betting system!\n\n*Want VIP + Premium access? Link in bio*",
+            "username": "StatEdge Bot"
+        }
+    elif tier in ['vip', 'plus']:
+        return {
+            "content": "🔥 **VIP INSIDER TEST** ⚡\n\n**EXCLUSIVE: Harper 2+ HRs | 2k Play**\nMLB system integration test - VIP members only!\n\n*Professional insider knowledge*",
+            "username": "StatEdge+ VIP"
+        }
+    elif tier == 'premium':
+        return {
+            "content": "🌟💎 **$19,999 PREMIUM TEST** 🚀\n\n**EXCLUSIVE PREMIUM SELECTION**\nHarper 2+ Home Runs | Premium Value Play\n\n*💎 PREMIUM EXCLUSIVE - High-energy premium value*",
+            "username": "StatEdge Premium"
+        }
+    else:
+        return {
+            "content": f"🎯 **MLB SYSTEM TEST** - {tier.upper()}\n\nIntegration test successful!\nWebhook: {webhook_name}",
+            "username": "MLB Bot"
+        }
+
+async def post_webhooks(prepared):
+    """Post every test message over one multiplexed HTTP/2 connection"""
+    async with httpx.AsyncClient(http2=True, timeout=5) as client:
+        return await asyncio.gather(
+            *(client.post(webhook_url, json=message) for webhook_url, message in prepared.values()),
+            return_exceptions=True
+        )
+
 def send_discord_webhook_test():
     """Send test messages to Discord webhooks"""
     
@@ -48,48 +82,28 @@ def send_discord_webhook_test():
     
     print(f"✅ Found {len(found_webhooks)} Discord webhooks!")
     
-    # Test each webhook
+    # Build each tier's test message up front, then post them all at once
+    prepared = {
+        webhook_name: (webhook_url, tier_test_message(webhook_name))
+        for webhook_name, webhook_url in found_webhooks.items()
+    }
     success_count = 0
     
-    for webhook_name, webhook_url in found_webhooks.items():
+    results = asyncio.run(post_webhooks(prepared))
+    
+    for webhook_name, result in zip(prepared, results):
         tier = webhook_name.split('_')[-1].lower()
         
         print(f"\n📢 Testing {webhook_name} ({tier.upper()} tier)")
         
-        # Create tier-specific test message
-        if tier == 'free':
-            message = {
-                "content": "🎯 **FREE TIER TEST** 👇💰\n\n**TEST: $1,000 Harper HR Slip**\nThis is a test from the MLB betting system!\n\n*Want VIP + Premium access? Link in bio*",
-                "username": "StatEdge Bot"
-            }
-        elif tier in ['vip', 'plus']:
-            message = {
-                "content": "🔥 **VIP INSIDER TEST** ⚡\n\n**EXCLUSIVE: Harper 2+ HRs | 2k Play**\nMLB system integration test - VIP members only!\n\n*Professional insider knowledge*",
-                "username": "StatEdge+ VIP"
-            }
-        elif tier == 'premium':
-            message = {
-                "content": "🌟💎 **$19,999 PREMIUM TEST** 🚀\n\n**EXCLUSIVE PREMIUM SELECTION**\nHarper 2+ Home Runs | Premium Value Play\n\n*💎 PREMIUM EXCLUSIVE - High-energy premium value*",
-                "username": "StatEdge Premium"
-            }
+        if isinstance(result, Exception):
+            print(f"   💥 Error: {result}")
+        elif result.status_code == 204:
+            print(f"   ✅ SUCCESS! Test message sent to {tier.upper()} channel")
+            success_count += 1
         else:
-            message = {
-                "content": f"🎯 **MLB SYSTEM TEST** - {tier.upper()}\n\nIntegration test successful!\nWebhook: {webhook_name}",
-                "username": "MLB Bot"
-            }
-        
-        try:
-            response = requests.post(webhook_url, json=message)
-            
-            if response.status_code == 204:
-                print(f"   ✅ SUCCESS! Test message sent to {tier.upper()} channel")
-                success_count += 1
-            else:
-                print(f"   ❌ Failed: HTTP {response.status_code}")
-                print(f"      Response: {response.text[:100]}")
-                
-        except Exception as e:
-            print(f"   💥 Error: {e}")
+            print(f"   ❌ Failed: HTTP {result.status_code}")
+            print(f"      Response: {result.text[:100]}")
     
     if success_count > 0:
         print(f"\n🎉 SUCCESS! {success_count}/{len(found_webhooks)} webhooks working!")
@@ -3,14 +3,47 @@
 
 import os
 import sys
-import json
-import requests
+import hashlib
+import orjson
+import asyncio
+import aiohttp
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-def test_simple_post():
+GRAPHQL_URL = "https://api.whop.com/graphql"
+
+# Minimal mutation - just create without returning fields
+CREATE_FORUM_POST_MUTATION = """
+mutation CreateForumPost($input: CreateForumPostInput!) {
+    createForumPost(input: $input)
+}
+"""
+
+# Persisted-query extension sent alongside the full text, so servers without
+# APQ support still get a query and a mutation is never retried
+CREATE_FORUM_POST_HASH = hashlib.sha256(CREATE_FORUM_POST_MUTATION.encode()).hexdigest()
+PERSISTED_QUERY = {"persistedQuery": {"version": 1, "sha256Hash": CREATE_FORUM_POST_HASH}}
+
+def create_session():
+    """Keep-alive session that other Whop test coroutines can share"""
+    connector = aiohttp.TCPConnector(limit=20, keepalive_timeout=30)
+    return aiohttp.ClientSession(connector=connector)
+
+async def _send(session, body, headers):
+    """POST a GraphQL body; returns (status, parsed JSON or error text)"""
+    async with session.post(GRAPHQL_URL, data=orjson.dumps(body), headers=headers) as response:
+        if response.status != 200:
+            return response.status, await response.text()
+        return response.status, orjson.loads(await response.read())
+
+async def post_forum_mutation(session, variables, headers):
+    """Send the mutation in a single request, registering its hash as it goes"""
+    body = {"query": CREATE_FORUM_POST_MUTATION, "variables": variables, "extensions": PERSISTED_QUERY}
+    return await _send(session, body, headers)
+
+async def test_simple_post(session):
     """Test with minimal mutation"""
     
     api_key = os.getenv('WHOP_API_KEY')
@@ -27,13 +60,6 @@ def test_simple_post():
     print("🔍 Testing Simple Forum Post")
     print("=" * 35)
     
-    # Try minimal mutation - just create without returning fields
-    mutation = """
-    mutation CreateForumPost($input: CreateForumPostInput!) {
-        createForumPost(input: $input)
-    }
-    """
-    
     variables = {
         "input": {
             "experience_id": free_experience_id,
@@ -48,37 +74,38 @@ def test_simple_post():
     print(f"🏢 Company: {company_id}")
     
     try:
-        response = requests.post(
-            "https://api.whop.com/graphql",
-            json={"query": mutation, "variables": variables},
-            headers=headers
-        )
-        
-        print(f"\n🌐 Response Status: {response.status_code}")
-        
-        if response.status_code == 200:
-            data = response.json()
-            
-            if 'data' in data and not data.get('errors'):
-                print("✅ SUCCESS! Forum post created!")
-                print("🎉 Check your Whop StatEdge (Free) forum for the test message!")
-                return True
-            elif 'errors' in data:
-                print("❌ GraphQL Errors:")
-                for error in data['errors']:
-                    print(f"   - {error.get('message', 'Unknown error')}")
-            else:
-                print(f"📄 Full Response: {json.dumps(data, indent=2)}")
-        else:
-            print(f"❌ HTTP Error: {response.text}")
-            
-    except Exception as e:
+        status, data = await post_forum_mutation(session, variables, headers)
+    except (aiohttp.ClientError, orjson.JSONDecodeError) as e:
         print(f"💥 Exception: {e}")
+        return False
+    
+    print(f"\n🌐 Response Status: {status}")
+    
+    if status != 200:
+        print(f"❌ HTTP Error: {data}")
+        return False
     
-    return False
+    if data.get('errors'):
+        print("❌ GraphQL Errors:")
+        for error in data['errors']:
+            print(f"   - {error.get('message', 'Unknown error')}")
+        return False
+    
+    if 'data' not in data:
+        print(f"📄 Full Response: {orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()}")
+        return False
+    
+    print("✅ SUCCESS! Forum post created!")
+    print("🎉 Check your Whop StatEdge (Free) forum for the test message!")
+    return True
+
+async def main():
+    """Run the post on a pooled session"""
+    async with create_session() as session:
+        return await test_simple_post(session)
 
 if __name__ == "__main__":
-    if test_simple_post():
+    if asyncio.run(main()):
         print("\n🎯 WHOP INTEGRATION IS LIVE!")
         print("Your MLB betting system can now post to forums!")
     else:
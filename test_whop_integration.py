@@ -2,41 +2,47 @@
 """Test Whop integration with sample data"""
 
 import os
-import sys
+import asyncio
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Add src to path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+from src.whop_client import WhopGraphQLClient
+from src.message_generator import get_generator
 
-from whop_client import WhopClient
-from message_generator import MessageGenerator
+# Required environment variables and the .env template placeholder for each
+REQUIRED_VARS = [
+    'WHOP_API_KEY',
+    'NEXT_PUBLIC_WHOP_COMPANY_ID',
+    'NEXT_PUBLIC_WHOP_AGENT_USER_ID',
+    'STATEDGE_FREE_EXPERIENCE_ID',
+    'STATEDGE_VIP_EXPERIENCE_ID',
+    'PREMIUM_EXPERIENCE_ID'
+]
+PLACEHOLDERS = {var: f'your-{var.lower().replace("_", "-")}-here' for var in REQUIRED_VARS}
+
+# Sample bet data, generated for every community tier
+SAMPLE_BET = {
+    'team_name': 'Philadelphia Phillies',
+    'player_name': 'Bryce Harper',
+    'bet_type': 'home_runs',
+    'odds': -110,
+    'units': 2,
+    'raw_input': 'Harper 2+ HRs -110 2u'
+}
+COMMUNITIES = ('StatEdge', 'StatEdge+', 'StatEdge Premium')
 
 def test_whop_client():
     """Test Whop API client"""
     print("🚀 Testing Whop Integration")
     print("=" * 50)
     
-    # Initialize client
-    client = WhopClient()
-    
-    # Check environment variables
-    required_vars = [
-        'WHOP_API_KEY',
-        'NEXT_PUBLIC_WHOP_COMPANY_ID', 
-        'NEXT_PUBLIC_WHOP_AGENT_USER_ID',
-        'STATEDGE_FREE_EXPERIENCE_ID',
-        'STATEDGE_VIP_EXPERIENCE_ID',
-        'PREMIUM_EXPERIENCE_ID'
-    ]
-    
     print("\n📋 Environment Check:")
     missing_vars = []
-    for var in required_vars:
-        value = os.getenv(var)
-        if value and value != f'your-{var.lower().replace("_", "-")}-here':
+    for var in REQUIRED_VARS:
+        value = os.environ.get(var)
+        if value and value != PLACEHOLDERS[var]:
             print(f"  ✅ {var}: {'*' * min(len(value), 8)}")
         else:
             print(f"  ❌ {var}: Not set or using placeholder")
@@ -54,44 +60,37 @@ def test_message_generator():
     print("\n🤖 Testing Message Generator")
     print("-" * 30)
     
-    generator = MessageGenerator()
-    
-    # Sample bet data
-    sample_bet = {
-        'team_name': 'Philadelphia Phillies',
-        'player_name': 'Bryce Harper', 
-        'bet_type': 'home_runs',
-        'odds': -110,
-        'units': 2,
-        'raw_input': 'Harper 2+ HRs -110 2u'
-    }
+    generator = get_generator()
     
-    # Test each community tier
-    communities = ['StatEdge', 'StatEdge+', 'StatEdge Premium']
+    try:
+        results = generator.generate_pregame_messages(SAMPLE_BET, list(COMMUNITIES))
+    except Exception as e:
+        print(f"  ❌ Generation failed: {e}")
+        return
     
-    for community in communities:
+    for community, result in results.items():
         print(f"\n📢 {community}:")
-        try:
-            result = generator.generate_pregame_message(sample_bet, community)
-            print(f"  Title: {result['title']}")
-            print(f"  Content: {result['content'][:100]}...")
-        except Exception as e:
-            print(f"  ❌ Generation failed: {e}")
+        print(f"  Title: {result['title']}")
+        print(f"  Content: {result['content'][:100]}...")
 
-def test_forum_posting():
-    """Test forum posting (dry run)"""
+async def test_forum_posting():
+    """Test forum posting to the free tier (opt-in, it hits the real Whop API)"""
+    if not os.environ.get('WHOP_LIVE_TESTS'):
+        print("\n⏭️  Live posting skipped, set WHOP_LIVE_TESTS=1 to run it")
+        return None
+    
+    print("\n" + "=" * 60)
+    print("🔴 LIVE POSTING TEST")
+    print("This will attempt to post to your Whop forums!")
     print("\n📝 Testing Forum Posting")
     print("-" * 30)
     
-    client = WhopClient()
-    
     # Sample post
-    success = client.post_to_forum(
-        community='StatEdge',
-        title='TEST: $1,000 Harper HR Bet 👇',
-        content='This is a test post from the MLB betting system.\n\nWant VIP + Premium access?',
-        paywall_amount=None
-    )
+    async with WhopGraphQLClient() as client:
+        success = await client.post_free_bet(
+            title='TEST: $1,000 Harper HR Bet 👇',
+            content='This is a test post from the MLB betting system.\n\nWant VIP + Premium access?'
+        )
     
     if success:
         print("  ✅ Test post sent successfully!")
@@ -113,20 +112,14 @@ def main():
     # Test 2: Message generation
     test_message_generator()
     
-    # Test 3: Forum posting (only if env is fully configured)
-    print("\n" + "=" * 60)
-    print("🔴 LIVE POSTING TEST")
-    print("This will attempt to post to your Whop forums!")
-    
-    confirm = input("Continue with live posting test? (yes/no): ")
-    if confirm.lower() == 'yes':
-        success = test_forum_posting()
-        if success:
-            print("\n🎉 All tests passed! Whop integration is ready.")
-        else:
-            print("\n⚠️  Forum posting failed - check API credentials")
+    # Test 3: Forum posting
+    success = asyncio.run(test_forum_posting())
+    if success is None:
+        print("\n✅ Tests completed")
+    elif success:
+        print("\n🎉 All tests passed! Whop integration is ready.")
     else:
-        print("\n✅ Tests completed (live posting skipped)")
+        print("\n⚠️  Forum posting failed - check API credentials")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file